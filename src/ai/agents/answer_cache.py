@@ -0,0 +1,213 @@
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable
+
+from src.ai.agents.mapping_store import MappingStore, mapping_store
+from src.utils import normalize_key
+
+# Mappings whose keys are the entity names that can appear in a question
+VOCABULARY_FILES = (
+    "ingredient_to_dishes.json",
+    "technique_to_dishes.json",
+    "planet_to_dishes.json",
+    "restaurant_to_dishes.json",
+    "skill_to_dishes.json",
+    "category_to_techniques.json",
+)
+
+# Words that do not change the answer: articles, prepositions, question words and
+# the verbs linking dishes to an entity. Negations, conjunctions and numbers are kept,
+# including roman numerals: "i" (grade I) and "d" are therefore not stopwords.
+STOPWORDS = frozenset(
+    """
+    il lo la l gli le un uno una
+    di del dello della dell dei degli delle
+    a al allo alla all ai agli alle ad
+    da dal dallo dalla dall dai dagli dalle
+    in nel nello nella nell nei negli nelle
+    su sul sullo sulla sull sui sugli sulle
+    per tra fra come che ci mi vi si
+    quale quali qual quanti quante cosa
+    sono è sia siano viene vengono
+    piatto piatti pietanza pietanze ricetta ricette
+    con contiene contengono contenenti include includono includa includano
+    usa usano utilizza utilizzano ingrediente ingredienti
+    dimmi elenca trova mostra galassia
+    """.split()
+)
+
+_TOKEN_PATTERN = re.compile(r"\w+\+*")
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(normalize_key(text))
+
+
+class QuestionNormalizer:
+    """
+    Reduce questions to the form used as answer cache key.
+
+    Entity names found in the mappings are replaced by their mapping key
+    (longest match first), then stopwords are dropped, so paraphrases such as
+    "Quali piatti contengono X?" and "Quali sono i piatti con X?" share the same key.
+    """
+
+    def __init__(self, *mappings: dict):
+        self.vocabulary: dict[tuple[str, ...], str] = {}
+        for mapping in mappings:
+            for name in mapping:
+                tokens = tuple(_tokenize(name))
+                if tokens:
+                    self.vocabulary.setdefault(tokens, name)
+        self.max_length = max((len(entity) for entity in self.vocabulary), default=0)
+
+    def normalize(self, question: str) -> str:
+        """
+        Return the normalized form of a question.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            str: The canonical entity keys and the remaining non-stopword tokens, in question order.
+        """
+        tokens = _tokenize(question)
+        normalized = []
+        position = 0
+        while position < len(tokens):
+            for length in range(min(self.max_length, len(tokens) - position), 0, -1):
+                entity = self.vocabulary.get(tuple(tokens[position : position + length]))
+                if entity is not None:
+                    normalized.append(f"<{entity}>")
+                    position += length
+                    break
+            else:
+                if tokens[position] not in STOPWORDS:
+                    normalized.append(tokens[position])
+                position += 1
+        return " ".join(normalized)
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of the dish ids answered for a question.
+
+    Keys are normalized questions (see `QuestionNormalizer`), so repeated and
+    paraphrased questions skip the agent loop. The cache is emptied when the
+    knowledge base version of the store changes (new snapshot, mapping files or Distanze.csv),
+    checked at most every check_interval seconds so that hits stay cheap.
+    Use one cache per engine, since engines answer differently.
+    """
+
+    def __init__(self, store: MappingStore = mapping_store, max_entries: int = 10_000, check_interval: float = 1.0):
+        self.store = store
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._answers: OrderedDict[str, frozenset[int]] = OrderedDict()
+        self._keys: dict[str, str] = {}
+        self._version: tuple | None = None
+        self._checked_at = float("-inf")
+        self._lock = Lock()
+
+    def _normalizer(self) -> QuestionNormalizer:
+        filenames = tuple(filename for filename in VOCABULARY_FILES if self.store.exists(filename))
+        return self.store.derive(filenames, QuestionNormalizer)
+
+    def _check_version(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        version = self.store.version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._answers.clear()
+                    self._keys.clear()
+                    self._version = version
+
+    def key(self, question: str) -> str:
+        """Return the cache key of a question, memoized per exact question text."""
+
+        key = self._keys.get(question)
+        if key is None:
+            key = self._normalizer().normalize(question)
+            with self._lock:
+                if len(self._keys) >= self.max_entries:
+                    self._keys.clear()
+                self._keys[question] = key
+        return key
+
+    def get(self, question: str) -> set[int] | None:
+        """
+        Return the cached answer of a question, or None on a miss.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            set[int] | None: A copy of the cached dish ids, or None if the question was not answered yet.
+        """
+        self._check_version()
+        key = self.key(question)
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self._answers.move_to_end(key)
+            self.hits += 1
+        return set(answer)
+
+    def put(self, question: str, dish_ids: set[int]) -> None:
+        """Store the answer of a question, evicting the least recently used one when full."""
+
+        self._check_version()
+        key = self.key(question)
+        with self._lock:
+            self._answers[key] = frozenset(dish_ids)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def get_or_compute(self, question: str, compute: Callable[[], set[int]]) -> set[int]:
+        """Return the cached answer, or compute it (e.g. with `query_dish_ids`) and cache it."""
+
+        answer = self.get(question)
+        if answer is None:
+            answer = compute()
+            self.put(question, answer)
+        return answer
+
+    async def a_get_or_compute(self, question: str, compute: Callable[[], Awaitable[set[int]]]) -> set[int]:
+        """Async variant of `get_or_compute`, e.g. with `a_query_dish_ids`."""
+
+        answer = self.get(question)
+        if answer is None:
+            answer = await compute()
+            self.put(question, answer)
+        return answer
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters, the number of cached answers and the snapshot version they belong to."""
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._answers),
+                "snapshot_version": self._version[0] if self._version is not None else None,
+            }
+
+    def clear(self) -> None:
+        """Drop every cached answer and reset the counters."""
+
+        with self._lock:
+            self._answers.clear()
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
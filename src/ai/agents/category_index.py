@@ -0,0 +1,30 @@
+from src.ai.agents.mapping_index import MappingIndex
+
+# Build-time index of the Manuale categories, written next to its two source mappings
+CATEGORY_DISHES_FILE = "category_to_dishes.json"
+
+
+def mapping_category_dishes(category_to_techniques: dict, technique_to_dishes: dict) -> dict:
+    """
+    Map categories directly to the dish ids of their techniques.
+
+    Technique names of the Manuale are resolved once against the menu techniques
+    (normalized match, then most similar name), so a category question is a
+    single lookup instead of one fuzzy lookup per technique.
+
+    Args:
+        category_to_techniques (dict): The category -> techniques mapping built by `mapping_category_technique`.
+        technique_to_dishes (dict): The technique -> dish ids mapping built from the menus.
+
+    Returns:
+        dict: A dictionary mapping category names to the sorted dish ids using at least one of their techniques.
+    """
+
+    technique_index = MappingIndex(technique_to_dishes)
+    category_to_dishes = {}
+    for category_name, techniques in category_to_techniques.items():
+        dish_ids = set()
+        for technique in techniques:
+            dish_ids.update(technique_index.lookup(technique, []))
+        category_to_dishes[category_name] = sorted(dish_ids)
+    return category_to_dishes
@@ -0,0 +1,105 @@
+from typing import Iterable, Iterator
+
+# Dish ids of the knowledge base are a few hundreds; a bitmask grows with the largest id,
+# so lists with larger (or negative) ids, e.g. made up by the LLM, are kept as plain sets
+MAX_BITMASK_DISH_ID = 1 << 16
+
+
+class DishSet:
+    """
+    Immutable set of dish ids stored as a Python int bitmask.
+
+    Dish ids are small dense integers (see `dish_mapping.json`), so bit i is set
+    when dish i belongs to the set and intersection/union/difference are single
+    word-level operations on the mask.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def from_ids(cls, dish_ids: Iterable[int]) -> "DishSet":
+        """
+        Build a DishSet from an iterable of dish ids.
+
+        Args:
+            dish_ids (Iterable[int]): Non-negative dish ids.
+
+        Raises:
+            ValueError: If a dish id is negative.
+
+        Returns:
+            DishSet: The set containing the provided ids.
+        """
+        bits = 0
+        for dish_id in dish_ids:
+            if dish_id < 0:
+                raise ValueError(f"Invalid dish id: {dish_id}")
+            bits |= 1 << dish_id
+        return cls(bits)
+
+    @classmethod
+    def union_all(cls, dish_sets: Iterable["DishSet"]) -> "DishSet":
+        """Return the union of all the provided sets."""
+
+        bits = 0
+        for dish_set in dish_sets:
+            bits |= dish_set.bits
+        return cls(bits)
+
+    def to_list(self) -> list[int]:
+        """Return the dish ids as a sorted list."""
+
+        return list(self)
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __and__(self, other: "DishSet") -> "DishSet":
+        return DishSet(self.bits & other.bits)
+
+    def __or__(self, other: "DishSet") -> "DishSet":
+        return DishSet(self.bits | other.bits)
+
+    def __sub__(self, other: "DishSet") -> "DishSet":
+        return DishSet(self.bits & ~other.bits)
+
+    def __contains__(self, dish_id: int) -> bool:
+        return dish_id >= 0 and bool(self.bits >> dish_id & 1)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DishSet) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"DishSet({self.to_list()})"
+
+
+def dish_id_sets(*id_lists: list[int]) -> tuple[DishSet, ...] | tuple[frozenset[int], ...]:
+    """
+    Convert the lists of dish ids received by a tool into sets supporting &, | and -.
+
+    Args:
+        *id_lists (list[int]): The lists of dish ids.
+
+    Returns:
+        tuple[DishSet, ...] | tuple[frozenset[int], ...]: One DishSet per list when every id is in
+            [0, MAX_BITMASK_DISH_ID], otherwise one frozenset per list.
+    """
+    if all(0 <= dish_id <= MAX_BITMASK_DISH_ID for dish_ids in id_lists for dish_id in dish_ids):
+        return tuple(DishSet.from_ids(dish_ids) for dish_ids in id_lists)
+    return tuple(frozenset(dish_ids) for dish_ids in id_lists)
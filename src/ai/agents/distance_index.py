@@ -0,0 +1,120 @@
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from src.ai.agents.dish_set import DishSet
+from src.ai.agents.mapping_index import MappingIndex
+
+DISTANCES_FILE = Path(__file__).parent.parent.parent.parent / "Dataset" / "knowledge_base" / "misc" / "Distanze.csv"
+
+
+def _to_words(dish_set: DishSet, n_words: int) -> np.ndarray:
+    return np.frombuffer(dish_set.bits.to_bytes(n_words * 8, "little"), dtype="<u8")
+
+
+def _from_words(words: np.ndarray) -> DishSet:
+    return DishSet(int.from_bytes(words.astype("<u8").tobytes(), "little"))
+
+
+class DistanceMatrix:
+    """
+    Planet distance matrix loaded into NumPy, with per-planet neighbors sorted by distance.
+
+    `neighbors_within` is a binary search on the sorted distances of the
+    reference planet instead of a scan over the whole row.
+    """
+
+    def __init__(self, planets: list[str], distances: np.ndarray):
+        self.planets = planets
+        self.distances = distances
+        self.planet_index: MappingIndex[int] = MappingIndex(
+            {planet: row for row, planet in enumerate(planets)}
+        )
+
+        # Sort each row by distance; the reference planet goes first among planets at distance 0
+        rows = np.arange(len(planets))
+        sort_keys = distances * 2 + (rows[None, :] != rows[:, None])
+        self.neighbor_order = np.argsort(sort_keys, axis=1, kind="stable")
+        self.sorted_distances = np.take_along_axis(distances, self.neighbor_order, axis=1)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "DistanceMatrix":
+        """
+        Load the square distance matrix of `Distanze.csv`.
+
+        Args:
+            path (Path): Path to the CSV file, whose first row and column hold the planet names.
+
+        Returns:
+            DistanceMatrix: The loaded matrix.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            headers = next(reader)[1:]  # Skip first column header "/"
+            rows = {row[0]: [int(distance) for distance in row[1:]] for row in reader}
+
+        planets = list(rows)
+        columns = {planet: column for column, planet in enumerate(headers)}
+        distances = np.array(
+            [[rows[planet][columns[other]] for other in planets] for planet in planets],
+            dtype=np.int64,
+        )
+        return cls(planets, distances)
+
+    def count_within(self, row: int, max_distance: int) -> int:
+        """Return how many planets (reference included) lie within max_distance from planet row."""
+
+        count = int(np.searchsorted(self.sorted_distances[row], max_distance, side="right"))
+        return max(count, 1)
+
+    def neighbors_within(self, row: int, max_distance: int) -> list[str]:
+        """Return the planets within max_distance from planet row, closest first, reference included."""
+
+        count = self.count_within(row, max_distance)
+        return [self.planets[neighbor] for neighbor in self.neighbor_order[row, :count]]
+
+
+class PlanetDistanceIndex:
+    """
+    Dishes reachable within a radius, answered with one binary search and one array lookup.
+
+    For every planet, the dish bitsets of its neighbors (sorted by distance) are
+    OR-accumulated, so the dishes within max_distance are the accumulated bitset
+    at the position returned by the binary search.
+    """
+
+    def __init__(self, matrix: DistanceMatrix, planet_dishes: MappingIndex[DishSet]):
+        self.matrix = matrix
+
+        dish_sets = [planet_dishes.lookup(planet, DishSet()) for planet in matrix.planets]
+        max_bits = max((dish_set.bits.bit_length() for dish_set in dish_sets), default=0)
+        n_words = max(1, (max_bits + 63) // 64)
+        self.planet_bits = np.stack([_to_words(dish_set, n_words) for dish_set in dish_sets])
+
+        # neighborhood_bits[row, k] = OR of the dish bitsets of the k + 1 closest planets to row
+        self.neighborhood_bits = np.bitwise_or.accumulate(self.planet_bits[matrix.neighbor_order], axis=1)
+
+    def resolve(self, planet: str) -> tuple[str | None, int | None]:
+        """Return the matrix name and row of planet (fuzzy matched), or (None, None)."""
+
+        return self.matrix.planet_index.match(planet)
+
+    def dishes_within(self, row: int, max_distance: int) -> DishSet:
+        """Return the dishes served on the planets within max_distance from planet row."""
+
+        count = self.matrix.count_within(row, max_distance)
+        return _from_words(self.neighborhood_bits[row, count - 1])
+
+
+@lru_cache(maxsize=8)
+def _load_distance_matrix(path: Path, mtime_ns: int, size: int) -> DistanceMatrix:
+    return DistanceMatrix.from_csv(path)
+
+
+def load_distance_matrix(path: Path) -> DistanceMatrix:
+    """Load a distance matrix CSV once per process, reloading it when the file changes on disk."""
+
+    stat = Path(path).stat()
+    return _load_distance_matrix(Path(path), stat.st_mtime_ns, stat.st_size)
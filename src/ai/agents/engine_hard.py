@@ -1,121 +1,233 @@
 import json
-import csv
-from difflib import SequenceMatcher
-from pathlib import Path
-from typing import Callable, Literal, TypeVar
+from typing import Literal, TypeVar
 
+import jsonref
 from datapizza.agents import Agent
-from datapizza.tools import tool
+from datapizza.tools import Tool, tool
+from pydantic import TypeAdapter, ValidationError
 from tenacity import retry, stop_after_attempt
 
-from src.evaluation import MAPPINGS_DIR
+from src.ai.agents.dish_set import DishSet, dish_id_sets
+from src.ai.agents.distance_index import DISTANCES_FILE, PlanetDistanceIndex
+from src.ai.agents.mapping_index import MappingIndex
+from src.ai.agents.mapping_store import (
+    _build_dish_set_index,
+    load_category_dish_sets,
+    load_dish_sets,
+    load_index,
+    load_licence_thresholds,
+    load_required_licence_thresholds,
+    mapping_store,
+)
 from src.ai.clients import get_grok_client
+from src.ai.models.query_plan import Constraint, ConstraintGroup, QueryPlan
 from src.ai.prompts.hard_engine import SYSTEM_PROMPT
-
-DISTANCES_FILE = Path(__file__).parent.parent.parent.parent / "Dataset" / "knowledge_base" / "misc" / "Distanze.csv"
+from src.ai.tracing import TracedClient, trace_tools
 
 
 T = TypeVar("T")
 
 
-def _load_mapping(filename: str) -> dict:
-    with open(MAPPINGS_DIR / filename, "r", encoding="utf-8") as mapping_file:
-        return json.load(mapping_file)
-
-
-def _find_most_similar_key(mapping: dict, normalized_name: str) -> str | None:
-    """Return the key whose normalized form is closest to normalized_name."""
-
-    best_key = None
-    best_score = 0.0
-    for key in mapping:
-        score = SequenceMatcher(None, normalized_name, key.lower()).ratio()
-        if score > best_score:
-            best_key = key
-            best_score = score
-    return best_key
-
-
 def _lookup_values(
-    mapping: dict[str, list[T]],
+    index: MappingIndex[list[T]],
     name: str,
     *,
     find_most_similar_feature: bool = True,
 ) -> list[T]:
-    normalized = name.strip().lower()
-    for key, values in mapping.items():
-        if key.lower() == normalized:
-            return values
-
-    if find_most_similar_feature:
-        similar_key = _find_most_similar_key(mapping, normalized)
-        if similar_key is not None:
-            return mapping[similar_key]
-    return []
+    return index.lookup(name, [], fuzzy=find_most_similar_feature)
 
 
 def _lookup_ids(
-    mapping: dict[str, list[int]], name: str, find_most_similar_feature: bool = True
-) -> list[int]:
-    return _lookup_values(
-        mapping, name, find_most_similar_feature=find_most_similar_feature
-    )
+    index: MappingIndex[DishSet], name: str, find_most_similar_feature: bool = True
+) -> DishSet:
+    return index.lookup(name, DishSet(), fuzzy=find_most_similar_feature)
 
 
 def _build_dish_ids_response(label: str, value: str, mapping_filename: str) -> str:
-    mapping = _load_mapping(mapping_filename)
-    ids = _lookup_ids(mapping, value)
-    return json.dumps({label: value, "dish_ids": ids})
+    ids = lookup_dish_ids(mapping_filename, value)
+    return json.dumps({label: value, "dish_ids": ids.to_list()})
 
 
 def _match_mapping_entry(
-    mapping: dict[str, T], name: str
+    index: MappingIndex[T], name: str
 ) -> tuple[str | None, T | None]:
-    normalized = name.strip().lower()
-    for key, value in mapping.items():
-        if key.lower() == normalized:
-            return key, value
+    return index.match(name)
 
-    similar_key = _find_most_similar_key(mapping, normalized)
-    if similar_key is not None:
-        return similar_key, mapping[similar_key]
 
-    return None, None
+def _lookup_list(
+    index: MappingIndex[list[str]], name: str, find_most_similar_feature: bool = True
+) -> list[str]:
+    """Lookup a list of strings (e.g., technique names) from a mapping."""
 
+    return _lookup_values(
+        index, name, find_most_similar_feature=find_most_similar_feature
+    )
 
-def _operation_matches(operation: str, left: int, right: int) -> bool:
-    comparators: dict[str, Callable[[int, int], bool]] = {
-        "eq": lambda candidate, reference: candidate == reference,
-        "ne": lambda candidate, reference: candidate != reference,
-        "g": lambda candidate, reference: candidate > reference,
-        "ge": lambda candidate, reference: candidate >= reference,
-        "l": lambda candidate, reference: candidate < reference,
-        "le": lambda candidate, reference: candidate <= reference,
-    }
 
-    try:
-        return comparators[operation](left, right)
-    except KeyError as exc:
-        raise ValueError(
-            f"Unsupported operation: {operation}. Use: eq, ne, g, ge, l, le"
-        ) from exc
+def lookup_dish_ids(mapping_filename: str, name: str) -> DishSet:
+    """Return the dish ids associated with name in a name -> dish ids mapping."""
 
+    return _lookup_ids(load_dish_sets(mapping_filename), name)
 
-def _collect_dish_ids_for_techniques(
-    techniques: list[str],
-    technique_mapping: dict[str, list[int]],
-    *,
-    allow_fuzzy_lookup: bool = True,
-) -> set[int]:
-    dish_ids: set[int] = set()
-    for technique in techniques:
-        technique_ids = _lookup_ids(
-            technique_mapping,
-            technique,
-            find_most_similar_feature=allow_fuzzy_lookup,
-        )
-        dish_ids.update(technique_ids)
-    return dish_ids
+
+def chef_licence_dish_ids(licence_name: str, licence_value: int, operation: str) -> DishSet | None:
+    """
+    Return the dishes whose chef holds the licence at a level matching the operation.
+
+    Args:
+        licence_name (str): Name of the licence (e.g., "Psionica (P)").
+        licence_value (int): The licence level value to compare.
+        operation (str): Comparison operation (eq, ne, g, ge, l, le).
+
+    Returns:
+        DishSet | None: The matching dishes, or None if the licence is unknown.
+    """
+    _, thresholds = _match_mapping_entry(
+        load_licence_thresholds("skill_to_dishes.json"), licence_name
+    )
+    if thresholds is None:
+        return None
+    return thresholds.select(licence_value, operation)
+
+
+def required_licence_dish_ids(licence_name: str, licence_value: int, operation: str) -> DishSet | None:
+    """
+    Return the dishes using a technique that requires the licence at a level matching the operation.
+
+    Args:
+        licence_name (str): Name of the licence (e.g., "Psionica (P)").
+        licence_value (int): The licence level value to compare.
+        operation (str): Comparison operation (eq, ne, g, ge, l, le).
+
+    Returns:
+        DishSet | None: The matching dishes, or None if the licence is unknown.
+    """
+    _, thresholds = _match_mapping_entry(
+        load_required_licence_thresholds(), licence_name
+    )
+    if thresholds is None:
+        return None
+    return thresholds.select(licence_value, operation)
+
+
+def category_dish_ids(category: str) -> DishSet:
+    """Return the dishes using at least one technique of the Manuale category."""
+
+    return _lookup_ids(load_category_dish_sets(), category)
+
+
+def _build_planet_distance_index(planet_to_dishes: dict[str, list[int]]) -> PlanetDistanceIndex:
+    return PlanetDistanceIndex(
+        mapping_store.distances(DISTANCES_FILE), _build_dish_set_index(planet_to_dishes)
+    )
+
+
+def _load_planet_distance_index() -> PlanetDistanceIndex:
+    # The builder reads the distances itself, so their source is part of the cache key
+    return mapping_store.derive(
+        "planet_to_dishes.json",
+        _build_planet_distance_index,
+        extra_signature=mapping_store.distances_signature(DISTANCES_FILE),
+    )
+
+
+def dishes_within_distance(planet: str, max_distance: int) -> tuple[str, DishSet | None]:
+    """
+    Return the dishes served on planets within max_distance light years from planet.
+
+    Args:
+        planet (str): Reference planet name (included in the result).
+        max_distance (int): Maximum distance in light years (inclusive).
+
+    Returns:
+        tuple[str, DishSet | None]: The resolved planet name and the matching dishes,
+        or None if the planet is not in the distance matrix.
+    """
+    distance_index = _load_planet_distance_index()
+    planet_key, planet_row = distance_index.resolve(planet)
+    if planet_key is None:
+        return planet, None
+    return planet_key, distance_index.dishes_within(planet_row, max_distance)
+
+
+_MAPPING_FILES = {
+    "ingredient": "ingredient_to_dishes.json",
+    "technique": "technique_to_dishes.json",
+    "planet": "planet_to_dishes.json",
+    "restaurant": "restaurant_to_dishes.json",
+}
+
+
+def preload_mappings() -> None:
+    """Load every mapping and lookup index used by the tools, so the first question does not pay for it."""
+
+    for mapping_filename in _MAPPING_FILES.values():
+        load_dish_sets(mapping_filename)
+    load_index("category_to_techniques.json")
+    load_category_dish_sets()
+    load_licence_thresholds("skill_to_dishes.json")
+    load_required_licence_thresholds()
+    _load_planet_distance_index()
+
+
+class UnsupportedQueryError(ValueError):
+    """Raised when a query plan cannot be evaluated locally."""
+
+
+def _evaluate_constraint(constraint: Constraint) -> DishSet:
+    if constraint.kind in _MAPPING_FILES:
+        return lookup_dish_ids(_MAPPING_FILES[constraint.kind], constraint.name)
+
+    if constraint.kind == "technique_category":
+        return category_dish_ids(constraint.name)
+
+    if constraint.kind in ("chef_licence", "required_licence"):
+        if constraint.licence_value is None or constraint.operation is None:
+            raise UnsupportedQueryError(f"Licence constraint without value or operation: {constraint}")
+        licence_lookup = chef_licence_dish_ids if constraint.kind == "chef_licence" else required_licence_dish_ids
+        dish_ids = licence_lookup(constraint.name, constraint.licence_value, constraint.operation)
+        return dish_ids if dish_ids is not None else DishSet()
+
+    if constraint.kind == "distance":
+        if constraint.max_distance is None:
+            raise UnsupportedQueryError(f"Distance constraint without max_distance: {constraint}")
+        _, dish_ids = dishes_within_distance(constraint.name, constraint.max_distance)
+        return dish_ids if dish_ids is not None else DishSet()
+
+    raise UnsupportedQueryError(f"Unsupported constraint kind: {constraint.kind}")
+
+
+def _evaluate_group(group: ConstraintGroup) -> DishSet:
+    if not group.any_of:
+        raise UnsupportedQueryError("Empty constraint group.")
+    return DishSet.union_all(_evaluate_constraint(constraint) for constraint in group.any_of)
+
+
+def evaluate_plan(plan: QueryPlan) -> DishSet:
+    """
+    Evaluate a QueryPlan locally against the mappings.
+
+    The result is the intersection of the include groups minus the union of the
+    exclude groups, each group being the union of its constraints.
+
+    Args:
+        plan (QueryPlan): The plan to evaluate.
+
+    Raises:
+        UnsupportedQueryError: If the plan is flagged as unsupported or is malformed.
+
+    Returns:
+        DishSet: The dishes satisfying the plan.
+    """
+    if not plan.supported or not plan.include:
+        raise UnsupportedQueryError("The query plan is flagged as unsupported or has no include constraints.")
+
+    result_ids = _evaluate_group(plan.include[0])
+    for group in plan.include[1:]:
+        result_ids &= _evaluate_group(group)
+    for group in plan.exclude:
+        result_ids -= _evaluate_group(group)
+    return result_ids
 
 
 @tool
@@ -148,22 +260,11 @@ def get_restaurant_dish_ids(restaurant: str) -> str:
     )
 
 
-def _lookup_list(
-    mapping: dict[str, list[str]], name: str, find_most_similar_feature: bool = True
-) -> list[str]:
-    """Lookup a list of strings (e.g., technique names) from a mapping."""
-
-    return _lookup_values(
-        mapping, name, find_most_similar_feature=find_most_similar_feature
-    )
-
-
 @tool
 def get_technique_from_category(category: str) -> str:
     """Return technique names associated with the provided category name."""
 
-    mapping = _load_mapping("category_to_techniques.json")
-    techniques = _lookup_list(mapping, category)
+    techniques = _lookup_list(load_index("category_to_techniques.json"), category)
     return json.dumps({"category": category, "techniques": techniques})
 
 
@@ -182,11 +283,9 @@ def get_chef_licence_dish_ids(licence_name: Literal["Psionica (P)", "Temporale (
     Returns:
         JSON string with licence_name, licence_value, operation, and matching dish_ids
     """
-    mapping = _load_mapping("skill_to_dishes.json")
+    result_ids = chef_licence_dish_ids(licence_name, licence_value, operation)
 
-    _, licence_data = _match_mapping_entry(mapping, licence_name)
-
-    if licence_data is None:
+    if result_ids is None:
         return json.dumps({
             "licence_name": licence_name, 
             "licence_value": licence_value, 
@@ -194,20 +293,11 @@ def get_chef_licence_dish_ids(licence_name: Literal["Psionica (P)", "Temporale (
             "dish_ids": []
         })
     
-    # Collect dish IDs based on operation
-    result_ids = set()
-    
-    for level_str, dish_ids in licence_data.items():
-        level = int(level_str)
-
-        if _operation_matches(operation, level, licence_value):
-            result_ids.update(dish_ids)
-    
     return json.dumps({
         "licence_name": licence_name,
         "licence_value": licence_value,
         "operation": operation,
-        "dish_ids": sorted(list(result_ids))
+        "dish_ids": result_ids.to_list()
     })
 
 
@@ -226,12 +316,9 @@ def get_dish_from_minimum_licence(licence_name: Literal["Psionica (P)", "Tempora
     Returns:
         JSON string with licence_name, licence_value, operation, techniques, and matching dish_ids
     """
-    licence_mapping = _load_mapping("licence_to_techniques.json")
-    technique_mapping = _load_mapping("technique_to_dishes.json")
+    result_ids = required_licence_dish_ids(licence_name, licence_value, operation)
 
-    _, licence_data = _match_mapping_entry(licence_mapping, licence_name)
-
-    if licence_data is None:
+    if result_ids is None:
         return json.dumps({
             "licence_name": licence_name, 
             "licence_value": licence_value, 
@@ -240,28 +327,12 @@ def get_dish_from_minimum_licence(licence_name: Literal["Psionica (P)", "Tempora
             "dish_ids": []
         })
     
-    # Collect techniques based on operation
-    matching_techniques = []
-    
-    for level_str, techniques in licence_data.items():
-        level = int(level_str)
-        
-        if _operation_matches(operation, level, licence_value):
-            matching_techniques.extend(techniques)
-    
-    # Now lookup dish IDs for each technique
-    result_ids = _collect_dish_ids_for_techniques(
-        matching_techniques,
-        technique_mapping,
-        allow_fuzzy_lookup=False,
-    )
-    
     return json.dumps({
         "licence_name": licence_name,
         "licence_value": licence_value,
         "operation": operation,
         #"techniques": matching_techniques,
-        "dish_ids": sorted(list(result_ids))
+        "dish_ids": result_ids.to_list()
     })
 
 
@@ -277,22 +348,9 @@ def get_dishes_with_both_technique_categories(first_category: str, second_catego
     Returns:
         JSON string with both categories, their techniques, and dish_ids that have techniques from both
     """
-    category_mapping = _load_mapping("category_to_techniques.json")
-    technique_mapping = _load_mapping("technique_to_dishes.json")
-    
-    # Get techniques for first category
-    first_techniques = _lookup_list(category_mapping, first_category)
-    
-    # Get techniques for second category
-    second_techniques = _lookup_list(category_mapping, second_category)
-    
-    # Get dish IDs for each technique in both categories
-    first_category_dishes = _collect_dish_ids_for_techniques(
-        first_techniques, technique_mapping
-    )
-    second_category_dishes = _collect_dish_ids_for_techniques(
-        second_techniques, technique_mapping
-    )
+    # Get dish IDs for the techniques of each category
+    first_category_dishes = category_dish_ids(first_category)
+    second_category_dishes = category_dish_ids(second_category)
     
     # Find intersection: dishes that have at least one technique from both categories
     dishes_with_both = first_category_dishes & second_category_dishes
@@ -302,7 +360,7 @@ def get_dishes_with_both_technique_categories(first_category: str, second_catego
         #"first_category_techniques": first_techniques,
         "second_category": second_category,
         #"second_category_techniques": second_techniques,
-        "dish_ids": sorted(list(dishes_with_both))
+        "dish_ids": dishes_with_both.to_list()
     })
 
 
@@ -318,24 +376,9 @@ def get_dishes_within_distance(planet: str, max_distance: int) -> str:
     Returns:
         JSON string with planet, max_distance, nearby_planets, and dish_ids from those planets
     """
-    # Load distances from CSV
-    distances = {}
-    with open(DISTANCES_FILE, "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        headers = next(reader)[1:]  # Skip first column header "/"
-        
-        for row in reader:
-            planet_name = row[0]
-            distances[planet_name] = {}
-            for i, distance_str in enumerate(row[1:]):
-                distances[planet_name][headers[i]] = int(distance_str)
-    
-    # Find the reference planet (case-insensitive with fuzzy matching)
-    planet_key, planet_distances = _match_mapping_entry(distances, planet)
-    if planet_key is not None:
-        planet = planet_key  # Use the original casing from the file
+    planet, result_ids = dishes_within_distance(planet, max_distance)
     
-    if planet_distances is None:
+    if result_ids is None:
         return json.dumps({
             "planet": planet,
             "max_distance": max_distance,
@@ -343,29 +386,60 @@ def get_dishes_within_distance(planet: str, max_distance: int) -> str:
             "dish_ids": []
         })
     
-    # Find planets within the distance range (including the reference planet itself)
-    nearby_planets = [planet]  # Include the reference planet
-    for other_planet, distance in planet_distances.items():
-        if distance <= max_distance and other_planet != planet:
-            nearby_planets.append(other_planet)
-    
-    # Load planet to dishes mapping
-    planet_mapping = _load_mapping("planet_to_dishes.json")
-    
-    # Get dish IDs for all nearby planets
-    result_ids = set()
-    for nearby_planet in nearby_planets:
-        planet_ids = _lookup_ids(planet_mapping, nearby_planet)
-        result_ids.update(planet_ids)
-    
     return json.dumps({
         "planet": planet,
         "max_distance": max_distance,
         #"nearby_planets": sorted(nearby_planets),
-        "dish_ids": sorted(list(result_ids))
+        "dish_ids": result_ids.to_list()
     })
 
 
+def _constraint_groups_schema(description: str) -> dict:
+    """Return the inlined JSON schema of a list of ConstraintGroup (no $ref, so it serializes as plain JSON)."""
+
+    schema = jsonref.replace_refs(TypeAdapter(list[ConstraintGroup]).json_schema(), proxies=False)
+    schema.pop("$defs", None)
+    schema["description"] = description
+    return schema
+
+
+def _resolve_constraints(include: list[dict], exclude: list[dict]) -> str:
+    """
+    Risolve in una sola chiamata tutti i vincoli della domanda e ritorna gli identificativi finali dei piatti.
+
+    Ogni gruppo contiene una lista any_of di vincoli in OR; il risultato è l'intersezione dei gruppi
+    di include meno l'unione dei gruppi di exclude.
+    Tipi di vincolo (kind):
+    - ingredient, technique, planet, restaurant: name è il nome da cercare
+    - technique_category: name è la categoria del Manuale di Cucina
+    - chef_licence: licenza dello chef, con licence_value e operation (eq, ne, g, ge, l, le)
+    - required_licence: licenza richiesta dalle tecniche del piatto, con licence_value e operation
+    - distance: name è il pianeta di riferimento, max_distance la distanza massima in anni luce (inclusa)
+    I campi non usati da un vincolo vanno impostati a null.
+
+    Returns:
+        JSON string with the final dish_ids, or an error message if the constraints are invalid
+    """
+    try:
+        plan = QueryPlan(supported=True, include=include, exclude=exclude)
+        dish_ids = evaluate_plan(plan)
+    except (ValidationError, ValueError) as exc:
+        return json.dumps({"error": str(exc), "dish_ids": []})
+
+    return json.dumps({"dish_ids": dish_ids.to_list()})
+
+
+resolve_constraints = Tool(
+    func=_resolve_constraints,
+    name="resolve_constraints",
+    properties={
+        "include": _constraint_groups_schema("Gruppi di vincoli che i piatti devono rispettare (almeno un gruppo)"),
+        "exclude": _constraint_groups_schema("Gruppi di vincoli che i piatti non devono rispettare"),
+    },
+    required=["include", "exclude"],
+)
+
+
 def _parse_ids(candidate, argument_name: str) -> list[int]:
     """Ensure the provided candidate is a list of integers."""
 
@@ -383,33 +457,36 @@ def _parse_ids(candidate, argument_name: str) -> list[int]:
 def intersect_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Return the intersection of two lists of dish ids."""
 
-    base_ids = _parse_ids(first_list, "first_list")
-    compare_ids = set(_parse_ids(second_list, "second_list"))
+    base_ids, compare_ids = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    intersection = [dish_id for dish_id in base_ids if dish_id in compare_ids]
-    return json.dumps({"intersection": intersection})
+    intersection = base_ids & compare_ids
+    return json.dumps({"intersection": sorted(intersection)})
 
 
 @tool
 def subtract_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Remove the ids of the second list from the first list."""
 
-    base_ids = _parse_ids(first_list, "first_list")
-    to_remove = set(_parse_ids(second_list, "second_list"))
+    base_ids, to_remove = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    difference = [dish_id for dish_id in base_ids if dish_id not in to_remove]
-    return json.dumps({"difference": difference})
+    difference = base_ids - to_remove
+    return json.dumps({"difference": sorted(difference)})
 
 
 @tool
 def union_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Return the union of two lists of dish ids (all unique ids from both lists)."""
 
-    first_ids = set(_parse_ids(first_list, "first_list"))
-    second_ids = set(_parse_ids(second_list, "second_list"))
+    first_ids, second_ids = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    union = sorted(list(first_ids | second_ids))
-    return json.dumps({"union": union})
+    union = first_ids | second_ids
+    return json.dumps({"union": sorted(union)})
 
 
 
@@ -455,9 +532,9 @@ def get_agent(system_prompt: str, model_name: str = "grok-4-1-fast-reasoning")->
 
     agent = Agent(
         name="assistant",
-        client=get_grok_client(model_name=model_name),
+        client=TracedClient(get_grok_client(model_name=model_name)),
         system_prompt=system_prompt,
-        tools=[
+        tools=trace_tools([
             get_technique_from_category,
             get_ingredient_dish_ids,
             get_technique_dish_ids,
@@ -470,23 +547,36 @@ def get_agent(system_prompt: str, model_name: str = "grok-4-1-fast-reasoning")->
             intersect_dish_ids,
             subtract_dish_ids,
             union_dish_ids,
-        ]
+            resolve_constraints,
+        ])
     )
     return agent
 
+def _dish_ids_from_agent_response(response) -> set[int]:
+    raw_output = getattr(response, "text", response)
+    if not isinstance(raw_output, str):
+        raw_output = str(raw_output)
+
+    return extract_dish_ids_from_response(raw_output)
+
 @retry(stop=stop_after_attempt(3))
 def query_dish_ids(question: str, agent: Agent) -> set[int]:
     """Esegue la domanda con l'agente e restituisce il set di identificativi."""
 
     response = agent.run(question)
+    return _dish_ids_from_agent_response(response)
 
-    raw_output = getattr(response, "text", response)
-    if not isinstance(raw_output, str):
-        raw_output = str(raw_output)
+@retry(stop=stop_after_attempt(3))
+async def a_query_dish_ids(question: str, agent: Agent) -> set[int]:
+    """
+    Versione asincrona di `query_dish_ids`.
 
-    extracted_ids = extract_dish_ids_from_response(raw_output)
+    Il loop dei tool usa il client asincrono e cede l'event loop durante le
+    chiamate al modello, così un solo processo gestisce molte domande concorrenti.
+    """
 
-    return extracted_ids
+    response = await agent.a_run(question)
+    return _dish_ids_from_agent_response(response)
 
 
 
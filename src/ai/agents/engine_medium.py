@@ -1,5 +1,4 @@
 import json
-from difflib import SequenceMatcher
 from pathlib import Path
 from typing import Literal
 
@@ -8,77 +7,49 @@ from datapizza.clients.openai import OpenAIClient
 from datapizza.tools import tool
 from tenacity import retry, stop_after_attempt
 
-from src.evaluation import MAPPINGS_DIR
+from src.ai.agents.dish_set import DishSet, dish_id_sets
+from src.ai.agents.mapping_store import load_dish_sets, load_licence_thresholds
 from src.ai.clients import get_grok_client
 from src.ai.prompts.easy_medium_engine import SYSTEM_PROMPT
+from src.ai.tracing import TracedClient, trace_tools
 
 
 
 
-def _load_mapping(filename: str) -> dict:
-    with open(MAPPINGS_DIR / filename, "r", encoding="utf-8") as mapping_file:
-        return json.load(mapping_file)
-
-
-def _find_most_similar_key(mapping: dict, normalized_name: str) -> str | None:
-    """Return the key whose normalized form is closest to normalized_name."""
-
-    best_key = None
-    best_score = 0.0
-    for key in mapping:
-        score = SequenceMatcher(None, normalized_name, key.lower()).ratio()
-        if score > best_score:
-            best_key = key
-            best_score = score
-    return best_key
-
-
-def _lookup_ids(mapping: dict, name: str) -> list[int]:
-    normalized = name.strip().lower()
-    for key, values in mapping.items():
-        if key.lower() == normalized:
-            return values
-
-    similar_key = _find_most_similar_key(mapping, normalized)
-    if similar_key is not None:
-        return mapping[similar_key]
-    return []
+def _lookup_ids(mapping_filename: str, name: str) -> DishSet:
+    return load_dish_sets(mapping_filename).lookup(name, DishSet())
 
 
 @tool
 def get_ingredient_dish_ids(ingredient: str) -> str:
     """Return dish ids associated with the provided ingredient."""
 
-    mapping = _load_mapping("ingredient_to_dishes.json")
-    ids = _lookup_ids(mapping, ingredient)
-    return json.dumps({"ingredient": ingredient, "dish_ids": ids})
+    ids = _lookup_ids("ingredient_to_dishes.json", ingredient)
+    return json.dumps({"ingredient": ingredient, "dish_ids": ids.to_list()})
 
 
 @tool
 def get_technique_dish_ids(technique: str) -> str:
     """Return dish ids associated with the provided technique."""
 
-    mapping = _load_mapping("technique_to_dishes.json")
-    ids = _lookup_ids(mapping, technique)
-    return json.dumps({"technique": technique, "dish_ids": ids})
+    ids = _lookup_ids("technique_to_dishes.json", technique)
+    return json.dumps({"technique": technique, "dish_ids": ids.to_list()})
 
 
 @tool
 def get_planet_dish_ids(planet: str) -> str:
     """Return dish ids associated with the provided planet name."""
 
-    mapping = _load_mapping("planet_to_dishes.json")
-    ids = _lookup_ids(mapping, planet)
-    return json.dumps({"planet": planet, "dish_ids": ids})
+    ids = _lookup_ids("planet_to_dishes.json", planet)
+    return json.dumps({"planet": planet, "dish_ids": ids.to_list()})
 
 
 @tool
 def get_restaurant_dish_ids(restaurant: str) -> str:
     """Return dish ids associated with the provided restaurant name."""
 
-    mapping = _load_mapping("restaurant_to_dishes.json")
-    ids = _lookup_ids(mapping, restaurant)
-    return json.dumps({"restaurant": restaurant, "dish_ids": ids})
+    ids = _lookup_ids("restaurant_to_dishes.json", restaurant)
+    return json.dumps({"restaurant": restaurant, "dish_ids": ids.to_list()})
 
 
 @tool
@@ -96,24 +67,10 @@ def get_chef_licence_dish_ids(licence_name: Literal["Psionica (P)", "Temporale (
     Returns:
         JSON string with skill_name, skill_value, operation, and matching dish_ids
     """
-    mapping = _load_mapping("skill_to_dishes.json")
+    # Find the licence (normalized lookup with fuzzy matching)
+    thresholds = load_licence_thresholds("skill_to_dishes.json").lookup(licence_name, None)
     
-    # Find the licence (case-insensitive with fuzzy matching)
-    licence_data = None
-    normalized_licence = licence_name.strip().lower()
-    
-    for key in mapping.keys():
-        if key.lower() == normalized_licence:
-            licence_data = mapping[key]
-            break
-    
-    # If no exact match, try fuzzy matching
-    if licence_data is None:
-        similar_key = _find_most_similar_key(mapping, normalized_licence)
-        if similar_key is not None:
-            licence_data = mapping[similar_key]
-    
-    if licence_data is None:
+    if thresholds is None:
         return json.dumps({
             "licence_name": licence_name, 
             "licence_value": licence_value, 
@@ -121,36 +78,14 @@ def get_chef_licence_dish_ids(licence_name: Literal["Psionica (P)", "Temporale (
             "dish_ids": []
         })
     
-    # Collect dish IDs based on operation
-    result_ids = set()
-    
-    for level_str, dish_ids in licence_data.items():
-        level = int(level_str)
-        
-        matches = False
-        if operation == "eq":
-            matches = level == licence_value
-        elif operation == "ne":
-            matches = level != licence_value
-        elif operation == "g":
-            matches = level > licence_value
-        elif operation == "ge":
-            matches = level >= licence_value
-        elif operation == "l":
-            matches = level < licence_value
-        elif operation == "le":
-            matches = level <= licence_value
-        else:
-            raise ValueError(f"Unsupported operation: {operation}. Use: eq, ne, g, ge, l, le")
-        
-        if matches:
-            result_ids.update(dish_ids)
+    # Precomputed union of the levels matching the operation
+    result_ids = thresholds.select(licence_value, operation)
     
     return json.dumps({
         "licence_name": licence_name,
         "licence_value": licence_value,
         "operation": operation,
-        "dish_ids": sorted(list(result_ids))
+        "dish_ids": result_ids.to_list()
     })
 
 
@@ -171,33 +106,36 @@ def _parse_ids(candidate, argument_name: str) -> list[int]:
 def intersect_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Return the intersection of two lists of dish ids."""
 
-    base_ids = _parse_ids(first_list, "first_list")
-    compare_ids = set(_parse_ids(second_list, "second_list"))
+    base_ids, compare_ids = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    intersection = [dish_id for dish_id in base_ids if dish_id in compare_ids]
-    return json.dumps({"intersection": intersection})
+    intersection = base_ids & compare_ids
+    return json.dumps({"intersection": sorted(intersection)})
 
 
 @tool
 def subtract_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Remove the ids of the second list from the first list."""
 
-    base_ids = _parse_ids(first_list, "first_list")
-    to_remove = set(_parse_ids(second_list, "second_list"))
+    base_ids, to_remove = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    difference = [dish_id for dish_id in base_ids if dish_id not in to_remove]
-    return json.dumps({"difference": difference})
+    difference = base_ids - to_remove
+    return json.dumps({"difference": sorted(difference)})
 
 
 @tool
 def union_dish_ids(first_list: list[int], second_list: list[int]) -> str:
     """Return the union of two lists of dish ids (all unique ids from both lists)."""
 
-    first_ids = set(_parse_ids(first_list, "first_list"))
-    second_ids = set(_parse_ids(second_list, "second_list"))
+    first_ids, second_ids = dish_id_sets(
+        _parse_ids(first_list, "first_list"), _parse_ids(second_list, "second_list")
+    )
 
-    union = sorted(list(first_ids | second_ids))
-    return json.dumps({"union": union})
+    union = first_ids | second_ids
+    return json.dumps({"union": sorted(union)})
 
 
 
@@ -242,9 +180,9 @@ def get_agent(system_prompt: str = SYSTEM_PROMPT, model_name: str = "grok-4-1-fa
 
     agent = Agent(
         name="assistant",
-        client=get_grok_client(model_name=model_name),
+        client=TracedClient(get_grok_client(model_name=model_name)),
         system_prompt=system_prompt,
-        tools=[
+        tools=trace_tools([
             get_ingredient_dish_ids,
             get_technique_dish_ids,
             get_planet_dish_ids,
@@ -253,22 +191,33 @@ def get_agent(system_prompt: str = SYSTEM_PROMPT, model_name: str = "grok-4-1-fa
             intersect_dish_ids,
             subtract_dish_ids,
             union_dish_ids,
-        ]
+        ])
     )
     return agent
 
+def _dish_ids_from_agent_response(response) -> set[int]:
+    raw_output = getattr(response, "text", response)
+    if not isinstance(raw_output, str):
+        raw_output = str(raw_output)
+
+    return extract_dish_ids_from_response(raw_output)
+
 def query_dish_ids(question: str, agent: Agent) -> set[int]:
     """Esegue la domanda con l'agente e restituisce il set di identificativi."""
 
     response = agent.run(question)
+    return _dish_ids_from_agent_response(response)
 
-    raw_output = getattr(response, "text", response)
-    if not isinstance(raw_output, str):
-        raw_output = str(raw_output)
+async def a_query_dish_ids(question: str, agent: Agent) -> set[int]:
+    """
+    Versione asincrona di `query_dish_ids`.
 
-    extracted_ids = extract_dish_ids_from_response(raw_output)
+    Il loop dei tool usa il client asincrono e cede l'event loop durante le
+    chiamate al modello, così un solo processo gestisce molte domande concorrenti.
+    """
 
-    return extracted_ids
+    response = await agent.a_run(question)
+    return _dish_ids_from_agent_response(response)
 
 
 
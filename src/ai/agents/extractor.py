@@ -1,12 +1,12 @@
 from pydantic import BaseModel
 from tenacity import retry, stop_after_attempt
-from src.ai.clients import get_openai_client
+from src.ai.clients import get_openai_client, rate_limit_wait
 from src.ai.models.menu_extractor import Restaurant
 from src.ai.prompts.menu_simple_extractor import EXTRACTOR_INPUT_PROMPT, EXTRACTOR_SYSTEM_PROMPT
 from datapizza.core.clients.models import ClientResponse
 
 
-@retry(stop=stop_after_attempt(3))
+@retry(stop=stop_after_attempt(5), wait=rate_limit_wait)
 def extraction_call(text: str, 
                     model_name: str = "gpt-4.1",
                     system_prompt: str = EXTRACTOR_SYSTEM_PROMPT,
@@ -0,0 +1,102 @@
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Iterable, Protocol
+
+
+def similarity(query: str, choice: str) -> float:
+    """Return the SequenceMatcher ratio between query and choice."""
+
+    return SequenceMatcher(None, query, choice).ratio()
+
+
+class FuzzyMatcher(Protocol):
+    """Interface of the approximate matchers used by the lookup indexes."""
+
+    def best_match(self, query: str) -> str | None:
+        """Return the most similar choice, or None if no choice scores above the threshold."""
+
+
+class SequenceMatcherScan:
+    """
+    Exhaustive matcher: scores every choice with SequenceMatcher.
+
+    Linear in the vocabulary size; kept as the reference implementation.
+    """
+
+    def __init__(self, choices: Iterable[str], threshold: float = 0.0):
+        self.choices = list(choices)
+        self.threshold = threshold
+
+    def best_match(self, query: str) -> str | None:
+        best_choice = None
+        best_score = self.threshold
+        for choice in self.choices:
+            score = similarity(query, choice)
+            if score > best_score:
+                best_choice = choice
+                best_score = score
+        return best_choice
+
+
+def _ngrams(text: str, n: int) -> set[str]:
+    padded = f"{' ' * (n - 1)}{text} "
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+class TrigramMatcher:
+    """
+    Approximate matcher backed by a character n-gram inverted index.
+
+    Candidates are the choices sharing the most n-grams with the query; only the
+    top_k of them are scored with SequenceMatcher. Queries sharing no n-gram with
+    any choice fall back to an exhaustive scan.
+    """
+
+    def __init__(
+        self,
+        choices: Iterable[str],
+        threshold: float = 0.0,
+        top_k: int = 10,
+        n: int = 3,
+    ):
+        self.choices = list(choices)
+        self.threshold = threshold
+        self.top_k = top_k
+        self.n = n
+
+        self._gram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for choice_id, choice in enumerate(self.choices):
+            grams = _ngrams(choice, n)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(choice_id)
+
+    def candidates(self, query: str) -> list[str]:
+        """Return the top_k choices ranked by n-gram overlap (Dice coefficient) with query."""
+
+        query_grams = _ngrams(query, self.n)
+        shared: Counter[int] = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+
+        ranked = sorted(
+            shared.items(),
+            key=lambda item: 2 * item[1] / (len(query_grams) + self._gram_counts[item[0]]),
+            reverse=True,
+        )
+        return [self.choices[choice_id] for choice_id, _ in ranked[: self.top_k]]
+
+    def best_match(self, query: str) -> str | None:
+        candidates = self.candidates(query)
+        if not candidates:
+            candidates = self.choices
+
+        best_choice = None
+        best_score = self.threshold
+        for choice in candidates:
+            score = similarity(query, choice)
+            if score > best_score:
+                best_choice = choice
+                best_score = score
+        return best_choice
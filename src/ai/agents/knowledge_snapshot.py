@@ -0,0 +1,302 @@
+"""
+Single-file, memory-mappable snapshot of the mapping artifacts and of the distance matrix.
+
+Layout (little-endian):
+    magic (4 bytes) | format version (uint32) | header offset (uint64) | header length (uint64)
+    arrays, each aligned to 8 bytes
+    JSON header describing the arrays and the mappings
+
+Every mapping is stored as string tables (UTF-8 blob + uint64 offsets) and
+CSR-style offset/value arrays, so opening a snapshot only maps the file and
+reads its header. Arrays (e.g. the distance matrix) are views on the mapped
+pages; mappings are decoded into Python dicts by each process that reads them.
+
+Each build writes a new file named after its content hash
+(`knowledge_snapshot-<version>.bin`) and then switches the pointer file
+`knowledge_snapshot.current` to it, so a snapshot that is memory-mapped by a
+running process is never replaced in place (which fails on Windows). The
+previous snapshot is kept until the next build.
+
+Usage:
+    python -m src.ai.agents.knowledge_snapshot --mappings-dir src/experiments/artifacts
+"""
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+
+from src.ai.agents.distance_index import DISTANCES_FILE, DistanceMatrix
+from src.evaluation import MAPPINGS_DIR
+from src.utils import read_json
+
+# Pointer file, containing the name of the current snapshot file in the same directory
+SNAPSHOT_FILE = "knowledge_snapshot.current"
+SNAPSHOT_MAGIC = b"DPKS"
+SNAPSHOT_FORMAT_VERSION = 1
+DISTANCES_SECTION = "distances"
+
+_PREFIX = struct.Struct("<4sIQQ")
+_ALIGNMENT = 8
+
+# Mapping files compiled into the snapshot: (file stem, depth, value type)
+SNAPSHOT_MAPPINGS = {
+    "ingredient_to_dishes": (1, "int"),
+    "technique_to_dishes": (1, "int"),
+    "planet_to_dishes": (1, "int"),
+    "restaurant_to_dishes": (1, "int"),
+    "skill_to_dishes": (2, "int"),
+    "licence_to_techniques": (2, "str"),
+    "category_to_techniques": (1, "str"),
+}
+
+
+class _SnapshotWriter:
+    def __init__(self):
+        self.arrays: dict[str, np.ndarray] = {}
+
+    def add_array(self, name: str, array: np.ndarray) -> None:
+        self.arrays[name] = np.ascontiguousarray(array)
+
+    def add_strings(self, name: str, strings: list[str]) -> None:
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(string) for string in encoded], dtype="<u8")
+        self.add_array(f"{name}.offsets", offsets)
+        self.add_array(f"{name}.blob", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def add_ragged(self, name: str, rows: list[list], value_type: str) -> None:
+        offsets = np.zeros(len(rows) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(row) for row in rows], dtype="<u8")
+        self.add_array(f"{name}.offsets", offsets)
+        values = [value for row in rows for value in row]
+        if value_type == "int":
+            self.add_array(f"{name}.values", np.array(values, dtype="<i8"))
+        else:
+            self.add_strings(f"{name}.values", values)
+
+    def add_mapping(self, name: str, mapping: dict, depth: int, value_type: str) -> None:
+        self.add_strings(f"{name}/keys", list(mapping))
+        if depth == 1:
+            self.add_ragged(f"{name}/entries", list(mapping.values()), value_type)
+            return
+
+        levels = [level for levels in mapping.values() for level in levels]
+        key_offsets = np.zeros(len(mapping) + 1, dtype="<u8")
+        key_offsets[1:] = np.cumsum([len(levels) for levels in mapping.values()], dtype="<u8")
+        self.add_array(f"{name}/levels.offsets_by_key", key_offsets)
+        self.add_strings(f"{name}/levels", [str(level) for level in levels])
+        self.add_ragged(
+            f"{name}/entries",
+            [list(values) for levels in mapping.values() for values in levels.values()],
+            value_type,
+        )
+
+    def write(self, pointer_path: Path, header: dict) -> str:
+        sections = {}
+        offset = _PREFIX.size
+        digest = hashlib.sha256()
+        for name, array in self.arrays.items():
+            offset += -offset % _ALIGNMENT
+            sections[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset += array.nbytes
+            digest.update(name.encode("utf-8"))
+            digest.update(array.tobytes())
+
+        snapshot_version = digest.hexdigest()
+        header = {**header, "snapshot_version": snapshot_version, "sections": sections}
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        header_offset = offset + (-offset % _ALIGNMENT)
+
+        # The file name is derived from the content: an existing file is identical and may be mapped, keep it
+        path = pointer_path.with_name(f"{pointer_path.stem}-{snapshot_version[:16]}.bin")
+        if not path.exists():
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, header_offset, len(header_bytes)))
+                for name, array in self.arrays.items():
+                    f.write(b"\0" * (sections[name]["offset"] - f.tell()))
+                    f.write(array.tobytes())
+                f.write(b"\0" * (header_offset - f.tell()))
+                f.write(header_bytes)
+            os.replace(tmp_path, path)
+
+        # The pointer is only read, never mapped, so it can be replaced while the old snapshot is in use
+        previous_path = resolve_snapshot(pointer_path)
+        tmp_pointer = pointer_path.with_name(pointer_path.name + ".tmp")
+        tmp_pointer.write_text(path.name, encoding="utf-8")
+        os.replace(tmp_pointer, pointer_path)
+
+        # Readers may have resolved the previous pointer without opening the file yet: keep that snapshot
+        for old_path in pointer_path.parent.glob(f"{pointer_path.stem}-*.bin"):
+            if old_path not in (path, previous_path):
+                try:
+                    old_path.unlink()
+                except OSError:
+                    # Still mapped by a running process (Windows): removed by a later build
+                    pass
+        return snapshot_version
+
+
+def resolve_snapshot(pointer_path: Path) -> Path | None:
+    """
+    Return the snapshot file a pointer file refers to.
+
+    Args:
+        pointer_path (Path): Path to the pointer file written by `build_snapshot`.
+
+    Returns:
+        Path | None: The current snapshot file, or None if there is no pointer or no snapshot.
+    """
+    pointer_path = Path(pointer_path)
+    try:
+        path = pointer_path.with_name(pointer_path.read_text(encoding="utf-8").strip())
+    except FileNotFoundError:
+        return None
+    return path if path.exists() else None
+
+
+def build_snapshot(mappings_dir: Path, distances_file: Path, output_path: Path | None = None) -> str:
+    """
+    Compile the mapping JSONs and the distance matrix into a single snapshot file.
+
+    Mapping files missing from mappings_dir are skipped, so a snapshot can be
+    built for the Easy/Medium levels too. The snapshot is written next to the
+    pointer file and the pointer is switched to it; the previous snapshot is kept
+    and older ones are removed when no process holds them.
+
+    Args:
+        mappings_dir (Path): Directory containing the mapping JSON files.
+        distances_file (Path): Path to `Distanze.csv`.
+        output_path (Path | None, optional): Pointer file path. Defaults to mappings_dir / SNAPSHOT_FILE.
+
+    Returns:
+        str: The snapshot version (SHA-256 of the compiled arrays).
+    """
+    mappings_dir = Path(mappings_dir)
+    output_path = Path(output_path) if output_path else mappings_dir / SNAPSHOT_FILE
+    writer = _SnapshotWriter()
+
+    mappings = {}
+    for name, (depth, value_type) in SNAPSHOT_MAPPINGS.items():
+        path = mappings_dir / f"{name}.json"
+        if not path.exists():
+            continue
+        writer.add_mapping(name, read_json(path), depth, value_type)
+        mappings[name] = {"depth": depth, "value_type": value_type}
+
+    has_distances = Path(distances_file).exists()
+    if has_distances:
+        matrix = DistanceMatrix.from_csv(distances_file)
+        writer.add_strings(f"{DISTANCES_SECTION}/planets", matrix.planets)
+        writer.add_array(f"{DISTANCES_SECTION}/matrix", matrix.distances.astype("<i8"))
+
+    return writer.write(output_path, {"mappings": mappings, "distances": has_distances})
+
+
+class KnowledgeSnapshot:
+    """
+    Read-only view over a snapshot file built by `build_snapshot`.
+
+    The file is memory-mapped once; arrays are views on the mapped pages, while
+    mappings are decoded (in the calling process) back to the same dicts as the
+    source JSON files.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+
+        magic, format_version, header_offset, header_length = _PREFIX.unpack(self._buffer[: _PREFIX.size].tobytes())
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.path} is not a knowledge snapshot.")
+        if format_version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot format version {format_version} (expected {SNAPSHOT_FORMAT_VERSION}). Rebuild the snapshot."
+            )
+        self.header = json.loads(self._buffer[header_offset : header_offset + header_length].tobytes())
+        self.version: str = self.header["snapshot_version"]
+
+    def array(self, name: str) -> np.ndarray:
+        """Return a zero-copy view of a stored array."""
+
+        section = self.header["sections"][name]
+        dtype = np.dtype(section["dtype"])
+        count = int(np.prod(section["shape"], dtype=np.int64))
+        start = section["offset"]
+        return self._buffer[start : start + count * dtype.itemsize].view(dtype).reshape(section["shape"])
+
+    def strings(self, name: str) -> list[str]:
+        """Decode a stored string table."""
+
+        offsets = self.array(f"{name}.offsets").tolist()
+        blob = self.array(f"{name}.blob").tobytes()
+        return [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def _ragged(self, name: str, value_type: str) -> list[list]:
+        offsets = self.array(f"{name}.offsets").tolist()
+        if value_type == "int":
+            values = self.array(f"{name}.values").tolist()
+        else:
+            values = self.strings(f"{name}.values")
+        return [values[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def has_mapping(self, name: str) -> bool:
+        """Return True if the mapping (file stem) is stored in the snapshot."""
+
+        return name in self.header["mappings"]
+
+    def mapping(self, name: str) -> dict[str, Any]:
+        """
+        Decode a mapping stored in the snapshot.
+
+        Args:
+            name (str): The mapping name, i.e. the stem of its JSON file.
+
+        Returns:
+            dict[str, Any]: The mapping, equal to the content of the source JSON file.
+        """
+        info = self.header["mappings"][name]
+        keys = self.strings(f"{name}/keys")
+        entries = self._ragged(f"{name}/entries", info["value_type"])
+        if info["depth"] == 1:
+            return dict(zip(keys, entries))
+
+        key_offsets = self.array(f"{name}/levels.offsets_by_key").tolist()
+        levels = self.strings(f"{name}/levels")
+        return {
+            key: dict(zip(levels[start:end], entries[start:end]))
+            for key, start, end in zip(keys, key_offsets, key_offsets[1:])
+        }
+
+    def has_distances(self) -> bool:
+        """Return True if the distance matrix is stored in the snapshot."""
+
+        return self.header["distances"]
+
+    def distance_matrix(self) -> DistanceMatrix | None:
+        """Return the distance matrix stored in the snapshot, or None if it was not compiled in."""
+
+        if not self.header["distances"]:
+            return None
+        return DistanceMatrix(self.strings(f"{DISTANCES_SECTION}/planets"), self.array(f"{DISTANCES_SECTION}/matrix"))
+
+
+@click.command()
+@click.option("--mappings-dir", type=click.Path(exists=True, file_okay=False, path_type=Path), default=MAPPINGS_DIR, show_default=True, help="Directory containing the mapping JSON files.")
+@click.option("--distances-file", type=click.Path(path_type=Path), default=DISTANCES_FILE, show_default=True, help="Path to Distanze.csv.")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Pointer file path. Defaults to <mappings-dir>/knowledge_snapshot.current.")
+def main(mappings_dir: Path, distances_file: Path, output: Path | None) -> None:
+    """Compile the mapping JSONs and Distanze.csv into a knowledge snapshot."""
+
+    pointer_path = output or mappings_dir / SNAPSHOT_FILE
+    version = build_snapshot(mappings_dir, distances_file, pointer_path)
+    click.echo(f"Snapshot {resolve_snapshot(pointer_path)} built (version {version[:12]}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from bisect import bisect_left, bisect_right
+from typing import Mapping
+
+from src.ai.agents.dish_set import DishSet
+
+_ROMAN_VALUES = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+
+def parse_licence_level(level: str | int) -> int:
+    """
+    Convert a licence level to an int.
+
+    Accepts ints, numeric strings ("3") and Roman numerals ("III"); a trailing
+    "+" (as in the LTK level "VI+") denotes the level right above the numeral.
+
+    Args:
+        level (str | int): The level as found in the mappings or in the Codice Galattico.
+
+    Raises:
+        ValueError: If the level cannot be parsed.
+
+    Returns:
+        int: The numeric level.
+    """
+    if isinstance(level, int):
+        return level
+
+    text = level.strip().upper()
+    plus = text.endswith("+")
+    if plus:
+        text = text[:-1].strip()
+
+    if text.lstrip("-").isdigit():
+        value = int(text)
+    elif text and all(char in _ROMAN_VALUES for char in text):
+        value = 0
+        for char, next_char in zip(text, text[1:] + " "):
+            char_value = _ROMAN_VALUES[char]
+            value += -char_value if char_value < _ROMAN_VALUES.get(next_char, 0) else char_value
+    else:
+        raise ValueError(f"Invalid licence level: {level}")
+
+    return value + 1 if plus else value
+
+
+class LicenceThresholds:
+    """
+    Dish sets of one licence precomputed for every comparison with a level.
+
+    Levels are sorted once; prefix/suffix unions give the dishes below/above a
+    level and the per-level complements give "ne", so every operation is a
+    binary search on the (few) levels plus a lookup of a precomputed DishSet.
+    """
+
+    def __init__(self, levels: Mapping[int, DishSet]):
+        self.levels = sorted(levels)
+        exact = [levels[level] for level in self.levels]
+
+        # prefix[i] = union of exact[:i], suffix[i] = union of exact[i:]
+        self._prefix = [DishSet()]
+        for dish_ids in exact:
+            self._prefix.append(self._prefix[-1] | dish_ids)
+        self._suffix = [DishSet()]
+        for dish_ids in reversed(exact):
+            self._suffix.append(self._suffix[-1] | dish_ids)
+        self._suffix.reverse()
+
+        self._exact = exact
+        self._all = self._prefix[-1]
+        self._except = [self._prefix[i] | self._suffix[i + 1] for i in range(len(exact))]
+
+    def select(self, licence_value: int, operation: str) -> DishSet:
+        """
+        Return the dishes whose level matches `level <operation> licence_value`.
+
+        Args:
+            licence_value (int): The level to compare with.
+            operation (str): Comparison operation (eq, ne, g, ge, l, le).
+
+        Raises:
+            ValueError: If the operation is not supported.
+
+        Returns:
+            DishSet: The union of the dishes of the matching levels.
+        """
+        left = bisect_left(self.levels, licence_value)
+        right = bisect_right(self.levels, licence_value)
+        found = left < right
+
+        if operation == "eq":
+            return self._exact[left] if found else DishSet()
+        if operation == "ne":
+            return self._except[left] if found else self._all
+        if operation == "g":
+            return self._suffix[right]
+        if operation == "ge":
+            return self._suffix[left]
+        if operation == "l":
+            return self._prefix[left]
+        if operation == "le":
+            return self._prefix[right]
+        raise ValueError(f"Unsupported operation: {operation}. Use: eq, ne, g, ge, l, le")
@@ -0,0 +1,70 @@
+from typing import Callable, Generic, Iterable, Mapping, TypeVar
+
+from src.ai.agents.fuzzy_matcher import FuzzyMatcher, TrigramMatcher
+from src.utils import normalize_key
+
+T = TypeVar("T")
+
+
+class MappingIndex(Generic[T]):
+    """
+    Lookup index over a mapping, built once and reused by every tool call.
+
+    Keys are indexed by their normalized form (see `normalize_key`), so exact
+    hits are a single dict probe; fuzzy matching is only used as a fallback and
+    is delegated to a pluggable matcher built over the normalized keys.
+    """
+
+    def __init__(
+        self,
+        mapping: Mapping[str, T],
+        *,
+        fuzzy_threshold: float = 0.0,
+        matcher_cls: Callable[[Iterable[str], float], FuzzyMatcher] = TrigramMatcher,
+    ):
+        self.mapping = mapping
+        self._normalized_keys: dict[str, str] = {}
+        for key in mapping:
+            self._normalized_keys.setdefault(normalize_key(key), key)
+        self._matcher = matcher_cls(self._normalized_keys, fuzzy_threshold)
+
+    def _find_most_similar_key(self, normalized_name: str) -> str | None:
+        """Return the key whose normalized form is closest to normalized_name."""
+
+        normalized_key = self._matcher.best_match(normalized_name)
+        if normalized_key is None:
+            return None
+        return self._normalized_keys[normalized_key]
+
+    def resolve(self, name: str, *, fuzzy: bool = True) -> str | None:
+        """
+        Return the canonical mapping key for the provided name.
+
+        Args:
+            name (str): The name to look up.
+            fuzzy (bool, optional): Fall back to the most similar key when there is no exact match. Defaults to True.
+
+        Returns:
+            str | None: The original key of the mapping, or None if nothing matches.
+        """
+        normalized = normalize_key(name)
+        key = self._normalized_keys.get(normalized)
+        if key is None and fuzzy:
+            key = self._find_most_similar_key(normalized)
+        return key
+
+    def match(self, name: str, *, fuzzy: bool = True) -> tuple[str | None, T | None]:
+        """Return the canonical key and its value, or (None, None) if nothing matches."""
+
+        key = self.resolve(name, fuzzy=fuzzy)
+        if key is None:
+            return None, None
+        return key, self.mapping[key]
+
+    def lookup(self, name: str, default: T, *, fuzzy: bool = True) -> T:
+        """Return the value associated with name, or default if nothing matches."""
+
+        key = self.resolve(name, fuzzy=fuzzy)
+        if key is None:
+            return default
+        return self.mapping[key]
@@ -0,0 +1,356 @@
+import json
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable
+
+from src.ai.agents.category_index import CATEGORY_DISHES_FILE, mapping_category_dishes
+from src.ai.agents.dish_set import DishSet
+from src.ai.agents.distance_index import DISTANCES_FILE, DistanceMatrix, load_distance_matrix
+from src.ai.agents.knowledge_snapshot import SNAPSHOT_FILE, SNAPSHOT_MAPPINGS, KnowledgeSnapshot, resolve_snapshot
+from src.ai.agents.licence_index import LicenceThresholds, parse_licence_level
+from src.ai.agents.mapping_index import MappingIndex
+from src.evaluation import MAPPINGS_DIR
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as mapping_file:
+        return json.load(mapping_file)
+
+
+def _build_dish_set_index(mapping: dict[str, list[int]]) -> MappingIndex[DishSet]:
+    return MappingIndex(
+        {key: DishSet.from_ids(dish_ids) for key, dish_ids in mapping.items()}
+    )
+
+
+def _build_licence_threshold_index(
+    mapping: dict[str, dict[str, list[int]]],
+) -> MappingIndex[LicenceThresholds]:
+    return MappingIndex(
+        {
+            licence_name: LicenceThresholds(
+                {
+                    parse_licence_level(level): DishSet.from_ids(dish_ids)
+                    for level, dish_ids in levels.items()
+                }
+            )
+            for licence_name, levels in mapping.items()
+        }
+    )
+
+
+def _build_required_licence_threshold_index(
+    licence_to_techniques: dict[str, dict[str, list[str]]],
+    technique_to_dishes: dict[str, list[int]],
+) -> MappingIndex[LicenceThresholds]:
+    # Techniques are resolved by normalized exact match only, as in the tools
+    technique_index = _build_dish_set_index(technique_to_dishes)
+    return MappingIndex(
+        {
+            licence_name: LicenceThresholds(
+                {
+                    parse_licence_level(level): DishSet.union_all(
+                        technique_index.lookup(technique, DishSet(), fuzzy=False)
+                        for technique in techniques
+                    )
+                    for level, techniques in levels.items()
+                }
+            )
+            for licence_name, levels in licence_to_techniques.items()
+        }
+    )
+
+
+def _build_category_dish_index(
+    category_to_techniques: dict[str, list[str]],
+    technique_to_dishes: dict[str, list[int]],
+) -> MappingIndex[DishSet]:
+    return _build_dish_set_index(mapping_category_dishes(category_to_techniques, technique_to_dishes))
+
+
+class MappingStore:
+    """
+    Process-wide, in-memory cache of the mapping artifacts used by the engine tools.
+
+    Each file is parsed once and kept in memory; it is reloaded only when its
+    modification time or size changes on disk (e.g. after a notebook regenerates it).
+    Structures derived from a file (lookup indexes, ...) are cached alongside it
+    and invalidated together with it.
+    When a knowledge snapshot (see `knowledge_snapshot.py`) is present in the
+    directory, mappings and distances are read from it instead of the JSON
+    files and `Distanze.csv`, unless the source file is newer than the snapshot.
+    The returned objects are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, base_dir: Path, snapshot_filename: str = SNAPSHOT_FILE):
+        self.base_dir = Path(base_dir)
+        self.snapshot_filename = snapshot_filename
+        self._entries: dict[str, tuple[tuple, Any]] = {}
+        self._derived: dict[tuple[str, Callable], tuple[tuple, Any]] = {}
+        self._snapshot: tuple[tuple, KnowledgeSnapshot] | None = None
+        self._lock = RLock()
+
+    def _signature(self, path: Path) -> tuple[int, int]:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self) -> KnowledgeSnapshot | None:
+        """Return the knowledge snapshot of the directory, or None if there is none."""
+
+        # The signature is the one of the pointer file, which is rewritten by every build
+        pointer_path = self.base_dir / self.snapshot_filename
+        try:
+            signature = self._signature(pointer_path)
+        except FileNotFoundError:
+            return None
+
+        entry = self._snapshot
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] != signature:
+                path = resolve_snapshot(pointer_path)
+                if path is None:
+                    return None
+                try:
+                    snapshot = KnowledgeSnapshot(path)
+                except FileNotFoundError:
+                    # Removed by a concurrent build after two pointer switches: follow the new pointer
+                    signature = self._signature(pointer_path)
+                    path = resolve_snapshot(pointer_path)
+                    if path is None:
+                        return None
+                    snapshot = KnowledgeSnapshot(path)
+                self._snapshot = (signature, snapshot)
+            return self._snapshot[1]
+
+    def _snapshot_signature(self, filename: str) -> tuple | None:
+        """Return the snapshot signature if filename must be read from the snapshot."""
+
+        snapshot = self.snapshot()
+        if snapshot is None or not snapshot.has_mapping(Path(filename).stem):
+            return None
+        snapshot_signature = self._snapshot[0]
+        json_path = self.base_dir / filename
+        if json_path.exists() and self._signature(json_path)[0] > snapshot_signature[0]:
+            return None
+        return ("snapshot", *snapshot_signature)
+
+    def _load_entry(self, filename: str) -> tuple[tuple, Any]:
+        path = self.base_dir / filename
+        signature = self._snapshot_signature(filename) or self._signature(path)
+
+        entry = self._entries.get(filename)
+        if entry is not None and entry[0] == signature:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None or entry[0] != signature:
+                if signature[0] == "snapshot":
+                    content = self.snapshot().mapping(Path(filename).stem)
+                else:
+                    content = _read_json(path)
+                entry = (signature, content)
+                self._entries[filename] = entry
+        return entry
+
+    def exists(self, filename: str) -> bool:
+        """Return True if filename is available, as a JSON file or in the snapshot."""
+
+        snapshot = self.snapshot()
+        if snapshot is not None and snapshot.has_mapping(Path(filename).stem):
+            return True
+        return (self.base_dir / filename).exists()
+
+    def _modified_ns(self, filename: str) -> int | None:
+        """Return the modification time of the source filename is read from, or None if it is missing."""
+
+        signature = self._snapshot_signature(filename)
+        if signature is not None:
+            return signature[1]
+        try:
+            return self._signature(self.base_dir / filename)[0]
+        except FileNotFoundError:
+            return None
+
+    def is_up_to_date(self, filename: str, sources: tuple[str, ...]) -> bool:
+        """
+        Return True if the JSON file filename exists and is not older than any of its sources.
+
+        Args:
+            filename (str): Name of a file built from the sources (e.g. at build time by the pipeline).
+            sources (tuple[str, ...]): Names of the mappings the file is built from; missing ones are ignored.
+
+        Returns:
+            bool: Whether filename can be used instead of rebuilding it from the sources.
+        """
+        built_ns = self._modified_ns(filename)
+        if built_ns is None:
+            return False
+        return all(modified_ns is None or modified_ns <= built_ns for modified_ns in map(self._modified_ns, sources))
+
+    def load(self, filename: str) -> Any:
+        """
+        Return the parsed content of a mapping file, reading it only if it changed.
+
+        Args:
+            filename (str): Name of the file inside the store directory.
+
+        Returns:
+            Any: The parsed JSON content.
+        """
+        return self._load_entry(filename)[1]
+
+    def derive(
+        self, filename: str | tuple[str, ...], builder: Callable[..., Any], extra_signature: tuple = ()
+    ) -> Any:
+        """
+        Return builder(content of filename), rebuilding it only when the file changes.
+
+        Args:
+            filename (str | tuple[str, ...]): Name of the file inside the store directory, or a tuple of
+                names when the structure depends on several files (builder then receives one content per file).
+            builder (Callable[..., Any]): Function building the derived structure from the parsed content.
+            extra_signature (tuple, optional): Signature of other sources the builder reads by itself
+                (e.g. `distances_signature()`); the structure is also rebuilt when it changes. Defaults to ().
+
+        Returns:
+            Any: The derived structure.
+        """
+        filenames = (filename,) if isinstance(filename, str) else filename
+        entries = [self._load_entry(name) for name in filenames]
+        signature = (*(entry[0] for entry in entries), extra_signature)
+
+        entry = self._derived.get((filename, builder))
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._lock:
+            entry = self._derived.get((filename, builder))
+            if entry is None or entry[0] != signature:
+                entry = (signature, builder(*(content for _, content in entries)))
+                self._derived[(filename, builder)] = entry
+        return entry[1]
+
+    def version(self) -> tuple:
+        """
+        Return a value that changes whenever the knowledge base changes on disk.
+
+        It combines the snapshot version with the signatures of the mapping JSON
+        files, which may override the snapshot when they are newer, and with the
+        signature of the distance matrix source (see `distances_signature`).
+
+        Returns:
+            tuple: The version, comparable with ==.
+        """
+        snapshot = self.snapshot()
+        signatures = []
+        for name in SNAPSHOT_MAPPINGS:
+            try:
+                signatures.append((name, *self._signature(self.base_dir / f"{name}.json")))
+            except FileNotFoundError:
+                continue
+        return (
+            snapshot.version if snapshot is not None else None,
+            tuple(signatures),
+            self.distances_signature(),
+        )
+
+    def distances_signature(self, distances_file: Path = DISTANCES_FILE) -> tuple:
+        """
+        Return the signature of the source `distances` reads the matrix from.
+
+        Args:
+            distances_file (Path, optional): Path to `Distanze.csv`. Defaults to DISTANCES_FILE.
+
+        Returns:
+            tuple: ("snapshot", *snapshot signature) when the matrix comes from the snapshot,
+                otherwise (path, mtime_ns, size) of distances_file, or (path, None) if it is missing.
+        """
+        distances_file = Path(distances_file)
+        try:
+            file_signature = self._signature(distances_file)
+        except FileNotFoundError:
+            file_signature = None
+
+        snapshot = self.snapshot()
+        entry = self._snapshot
+        if snapshot is not None and entry is not None and snapshot.has_distances():
+            # As for the mappings, a source file newer than the snapshot wins
+            if file_signature is None or file_signature[0] <= entry[0][0]:
+                return ("snapshot", *entry[0])
+        if file_signature is None:
+            return (str(distances_file), None)
+        return (str(distances_file), *file_signature)
+
+    def distances(self, distances_file: Path = DISTANCES_FILE) -> DistanceMatrix:
+        """Return the distance matrix from the snapshot, unless distances_file is newer or missing from it."""
+
+        if self.distances_signature(distances_file)[0] == "snapshot":
+            matrix = self.snapshot().distance_matrix()
+            if matrix is not None:
+                return matrix
+        return load_distance_matrix(distances_file)
+
+    def clear(self) -> None:
+        """Drop every cached mapping, forcing a reload on the next access."""
+
+        with self._lock:
+            self._entries.clear()
+            self._derived.clear()
+            self._snapshot = None
+
+
+mapping_store = MappingStore(MAPPINGS_DIR)
+
+
+def load_mapping(filename: str) -> Any:
+    """Load a mapping from MAPPINGS_DIR through the shared process-wide store."""
+
+    return mapping_store.load(filename)
+
+
+def load_index(filename: str) -> MappingIndex:
+    """Return the normalized-key lookup index of a mapping in MAPPINGS_DIR."""
+
+    return mapping_store.derive(filename, MappingIndex)
+
+
+def load_dish_sets(filename: str) -> MappingIndex[DishSet]:
+    """Return the lookup index of a name -> dish ids mapping, with values loaded as DishSet."""
+
+    return mapping_store.derive(filename, _build_dish_set_index)
+
+
+def load_licence_thresholds(filename: str) -> MappingIndex[LicenceThresholds]:
+    """Return the lookup index of a licence -> {level: dish ids} mapping, with cumulative sets per level."""
+
+    return mapping_store.derive(filename, _build_licence_threshold_index)
+
+
+def load_required_licence_thresholds(
+    licence_filename: str = "licence_to_techniques.json",
+    technique_filename: str = "technique_to_dishes.json",
+) -> MappingIndex[LicenceThresholds]:
+    """Return, per licence, the cumulative sets of dishes using techniques that require each level."""
+
+    return mapping_store.derive((licence_filename, technique_filename), _build_required_licence_threshold_index)
+
+
+def load_category_dish_sets(
+    category_filename: str = "category_to_techniques.json",
+    technique_filename: str = "technique_to_dishes.json",
+    dishes_filename: str = CATEGORY_DISHES_FILE,
+) -> MappingIndex[DishSet]:
+    """
+    Return the lookup index of the Manuale categories with the dishes of their techniques.
+
+    The index written at build time (`category_to_dishes.json`) is loaded when it
+    is not older than the category and technique mappings; otherwise their join
+    is rebuilt in memory, so it never lags behind a regenerated `technique_to_dishes.json`.
+    """
+    if mapping_store.is_up_to_date(dishes_filename, (category_filename, technique_filename)):
+        return mapping_store.derive(dishes_filename, _build_dish_set_index)
+    return mapping_store.derive((category_filename, technique_filename), _build_category_dish_index)
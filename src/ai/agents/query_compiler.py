@@ -0,0 +1,65 @@
+from datapizza.agents import Agent
+
+from src.ai.agents.engine_hard import UnsupportedQueryError, evaluate_plan, query_dish_ids
+from src.ai.agents.mapping_store import load_mapping
+from src.ai.clients import get_grok_client
+from src.ai.models.query_plan import QueryPlan
+from src.ai.prompts.query_compiler import INPUT_PROMPT, SYSTEM_PROMPT
+from src.ai.tracing import TracedClient
+
+def _format_system_prompt(system_prompt: str = SYSTEM_PROMPT) -> str:
+    categories = load_mapping("category_to_techniques.json")
+    return system_prompt.format(
+        categories="\n".join(f"- {category}" for category in categories)
+    )
+
+
+def compile_question(question: str,
+                     model_name: str = "grok-4-1-fast-reasoning",
+                     system_prompt: str | None = None,
+                     input_prompt: str = INPUT_PROMPT) -> QueryPlan:
+    """
+    Translate a question into a QueryPlan with a single structured-output call.
+
+    Args:
+        question (str): The question to compile.
+        model_name (str, optional): The name of the model to use. Defaults to "grok-4-1-fast-reasoning".
+        system_prompt (str | None, optional): The system prompt. Defaults to SYSTEM_PROMPT filled with the Manuale categories.
+        input_prompt (str, optional): The input prompt template. Defaults to INPUT_PROMPT.
+
+    Returns:
+        QueryPlan: The compiled query plan.
+    """
+    if system_prompt is None:
+        system_prompt = _format_system_prompt()
+
+    client = TracedClient(get_grok_client(model_name=model_name))
+    result = client.structured_response(
+        system_prompt=system_prompt,
+        output_cls=QueryPlan,
+        input=input_prompt.format(question=question)
+    )
+    return result.structured_data[0]
+
+
+def answer_question(question: str, agent: Agent, model_name: str = "grok-4-1-fast-reasoning") -> set[int]:
+    """
+    Answer a question with one compile call plus local set algebra.
+
+    Falls back to the agent loop (`query_dish_ids`) when the question cannot be
+    compiled or the plan cannot be evaluated.
+
+    Args:
+        question (str): The question to answer.
+        agent (Agent): The agent used as fallback.
+        model_name (str, optional): The model used to compile the question. Defaults to "grok-4-1-fast-reasoning".
+
+    Returns:
+        set[int]: The identifiers of the matching dishes.
+    """
+    try:
+        plan = compile_question(question, model_name=model_name)
+        return set(evaluate_plan(plan))
+    except Exception as e:
+        print(f"Query compiler fallback to agent: {e}")
+        return query_dish_ids(question=question, agent=agent)
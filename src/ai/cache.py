@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from datapizza.clients.openai import OpenAIClient
+from datapizza.core.clients.models import ClientResponse
+from datapizza.memory import Memory
+from datapizza.tools import Tool
+from datapizza.type import Block, FunctionCallBlock
+from pydantic import BaseModel
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of LLM responses stored in a single SQLite file.
+
+    Entries expire after ttl_seconds (if set) and the least recently used
+    entries are evicted once the cache holds more than max_entries responses.
+    """
+
+    def __init__(self, path: str | Path, ttl_seconds: float | None = None, max_entries: int = 10_000):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key: str) -> object | None:
+        """
+        Return the cached value for key, or None if missing or expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            object | None: The cached value.
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            row = connection.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key: str, value: object) -> None:
+        """
+        Store value under key, evicting expired and least recently used entries.
+
+        Args:
+            key (str): The cache key.
+            value (object): A picklable value.
+        """
+        now = time.time()
+        payload = pickle.dumps(value)
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.ttl_seconds is not None:
+                connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            connection.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock, self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def _schema_hash(output_cls: type[BaseModel] | None) -> str:
+    if output_cls is None:
+        return ""
+    schema = json.dumps(output_cls.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+def _input_key(input: str | list[Block]) -> str:
+    if isinstance(input, str):
+        return input
+    return json.dumps([block.to_dict() for block in input], sort_keys=True, default=str)
+
+
+def build_cache_key(
+    model_name: str,
+    system_prompt: str | None,
+    input: str | list[Block],
+    output_cls: type[BaseModel] | None = None,
+    tools: list[Tool] | None = None,
+    memory: Memory | None = None,
+    options: dict | None = None,
+) -> str:
+    """
+    Build a stable cache key for an LLM call.
+
+    Unlike the key used by datapizza's in-memory cache, it does not rely on
+    Python's per-process hash(), so it can be shared across runs.
+
+    Args:
+        model_name (str): The model name.
+        system_prompt (str | None): The system prompt.
+        input (str | list[Block]): The input text or blocks.
+        output_cls (type[BaseModel] | None, optional): The structured output class. Defaults to None.
+        tools (list[Tool] | None, optional): The tools exposed to the model. Defaults to None.
+        memory (Memory | None, optional): The conversation history. Defaults to None.
+        options (dict | None, optional): Extra call options such as temperature or tool_choice. Defaults to None.
+
+    Returns:
+        str: The SHA-256 hex digest of the call parameters.
+    """
+    components = {
+        "model": model_name,
+        "system_prompt": system_prompt or "",
+        "input": _input_key(input),
+        "schema": _schema_hash(output_cls),
+        "tools": [tool.to_dict() for tool in tools or []],
+        "memory": memory.to_dict() if memory else [],
+        "options": options or {},
+    }
+    return hashlib.sha256(json.dumps(components, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _detach_tools(response: ClientResponse) -> ClientResponse:
+    """Return a picklable copy of response with the Tool objects removed from function calls."""
+
+    content = [
+        FunctionCallBlock(id=block.id, arguments=block.arguments, name=block.name, tool=None)
+        if isinstance(block, FunctionCallBlock) else block
+        for block in response.content
+    ]
+    return ClientResponse(content=content, delta=response.delta, stop_reason=response.stop_reason, usage=response.usage)
+
+
+def _attach_tools(response: ClientResponse, tools: list[Tool] | None) -> ClientResponse | None:
+    """Rebind cached function calls to the provided tools, or return None if a tool is missing."""
+
+    tools_by_name = {tool.name: tool for tool in tools or []}
+    for block in response.content:
+        if isinstance(block, FunctionCallBlock):
+            if block.name not in tools_by_name:
+                return None
+            block.tool = tools_by_name[block.name]
+    return response
+
+
+class CachedOpenAIClient(OpenAIClient):
+    """
+    OpenAIClient that stores invoke/structured_response results in a ResponseCache.
+
+    Streaming calls are never cached.
+    """
+
+    def __init__(self, *args, response_cache: ResponseCache, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.response_cache = response_cache
+
+    def _cache_key(self, input, system_prompt, output_cls=None, tools=None, memory=None, options=None) -> str:
+        return build_cache_key(
+            model_name=self.model_name,
+            system_prompt=system_prompt or self.system_prompt,
+            input=input,
+            output_cls=output_cls,
+            tools=tools,
+            memory=memory,
+            options=options,
+        )
+
+    def _get_cached(self, key: str, tools: list[Tool] | None) -> ClientResponse | None:
+        cached = self.response_cache.get(key)
+        if cached is None:
+            return None
+        return _attach_tools(cached, tools)
+
+    def _set_cached(self, key: str, response: ClientResponse) -> None:
+        try:
+            self.response_cache.set(key, _detach_tools(response))
+        except (pickle.PicklingError, TypeError, AttributeError, sqlite3.Error) as e:
+            print(f"Response not cached: {e}")
+
+    def invoke(self, input, tools=None, memory=None, system_prompt=None, **kwargs) -> ClientResponse:
+        key = self._cache_key(input, system_prompt, tools=tools, memory=memory, options=kwargs)
+        cached = self._get_cached(key, tools)
+        if cached is not None:
+            return cached
+        response = super().invoke(input, tools=tools, memory=memory, system_prompt=system_prompt, **kwargs)
+        self._set_cached(key, response)
+        return response
+
+    async def a_invoke(self, input, tools=None, memory=None, system_prompt=None, **kwargs) -> ClientResponse:
+        key = self._cache_key(input, system_prompt, tools=tools, memory=memory, options=kwargs)
+        cached = self._get_cached(key, tools)
+        if cached is not None:
+            return cached
+        response = await super().a_invoke(input, tools=tools, memory=memory, system_prompt=system_prompt, **kwargs)
+        self._set_cached(key, response)
+        return response
+
+    def structured_response(self, *, input, output_cls, memory=None, system_prompt=None, tools=None, **kwargs) -> ClientResponse:
+        key = self._cache_key(input, system_prompt, output_cls=output_cls, tools=tools, memory=memory, options=kwargs)
+        cached = self._get_cached(key, tools)
+        if cached is not None:
+            return cached
+        response = super().structured_response(
+            input=input, output_cls=output_cls, memory=memory, system_prompt=system_prompt, tools=tools, **kwargs
+        )
+        self._set_cached(key, response)
+        return response
+
+    async def a_structured_response(self, *, input, output_cls, memory=None, system_prompt=None, tools=None, **kwargs) -> ClientResponse:
+        key = self._cache_key(input, system_prompt, output_cls=output_cls, tools=tools, memory=memory, options=kwargs)
+        cached = self._get_cached(key, tools)
+        if cached is not None:
+            return cached
+        response = await super().a_structured_response(
+            input=input, output_cls=output_cls, memory=memory, system_prompt=system_prompt, tools=tools, **kwargs
+        )
+        self._set_cached(key, response)
+        return response
+
+
+_default_cache: ResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache | None:
+    """
+    Return the response cache configured through environment variables.
+
+    LLM_CACHE_PATH enables the cache; LLM_CACHE_TTL (seconds) and
+    LLM_CACHE_MAX_ENTRIES tune expiry and eviction.
+
+    Returns:
+        ResponseCache | None: The shared cache, or None if LLM_CACHE_PATH is not set.
+    """
+    global _default_cache
+    path = os.getenv("LLM_CACHE_PATH")
+    if not path:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.path != Path(path):
+            ttl = os.getenv("LLM_CACHE_TTL")
+            _default_cache = ResponseCache(
+                path,
+                ttl_seconds=float(ttl) if ttl else None,
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+            )
+        return _default_cache
@@ -1,32 +1,131 @@
-
 from datapizza.clients.openai import OpenAIClient
 import os
+import threading
+import httpx
 from dotenv import load_dotenv
+from openai import RateLimitError
 from pydantic import BaseModel
+from tenacity import RetryCallState, wait_random_exponential
+
+from src.ai.cache import CachedOpenAIClient, ResponseCache, get_default_cache
 
 load_dotenv()
 
-def get_grok_client(model_name: str = "grok-4-1-fast-reasoning") -> OpenAIClient:
+_rate_limit_backoff = wait_random_exponential(multiplier=1, max=60)
+
+
+def rate_limit_wait(retry_state: RetryCallState) -> float:
+    """Tenacity wait strategy that backs off only on rate-limit errors.
+
+    Honours the Retry-After header when the provider sends one, otherwise uses
+    an exponential backoff with jitter. Other errors are retried immediately.
+
+    Args:
+        retry_state (RetryCallState): The tenacity retry state.
+    Returns:
+        float: The number of seconds to wait before the next attempt.
+    """
+    exception = retry_state.outcome.exception() if retry_state.outcome else None
+    if not isinstance(exception, RateLimitError):
+        return 0
+    retry_after = exception.response.headers.get("retry-after")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return _rate_limit_backoff(retry_state)
+
+
+GROK_BASE_URL = "https://api.x.ai/v1"
+
+_http_client: httpx.Client | None = None
+_clients: dict[tuple, OpenAIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the HTTP client whose connection pool is shared by every registered client."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            follow_redirects=True,
+        )
+    return _http_client
+
+
+def get_client(provider: str, model_name: str, api_key: str | None, base_url: str | None = None,
+               cache: ResponseCache | None = None) -> OpenAIClient:
+    """Get the registered client for (provider, model_name, base_url), creating it on first use.
+
+    Registered clients are shared across threads and reuse a single HTTP
+    connection pool, so keep-alive connections and TLS sessions survive
+    between calls.
+
+    Args:
+        provider (str): The provider name, e.g. "openai" or "grok".
+        model_name (str): The name of the model to use.
+        api_key (str | None): The API key of the provider.
+        base_url (str | None, optional): The base URL of the API. Defaults to None (OpenAI).
+        cache (ResponseCache | None, optional): Persistent response cache. Defaults to the cache configured by LLM_CACHE_PATH, if any.
+    Returns:
+        OpenAIClient: The shared client instance.
+    """
+    if cache is None:
+        cache = get_default_cache()
+    key = (provider, model_name, base_url, cache.path if cache is not None else None)
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            kwargs = dict(api_key=api_key, model=model_name, base_url=base_url, http_client=_get_http_client())
+            if cache is None:
+                client = OpenAIClient(**kwargs)
+            else:
+                client = CachedOpenAIClient(response_cache=cache, **kwargs)
+            # Build the underlying SDK client now, so concurrent first calls do not race on it.
+            client._get_client()
+            _clients[key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Drop the registered clients and close the shared HTTP connection pool."""
+    global _http_client
+    with _clients_lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def get_grok_client(model_name: str = "grok-4-1-fast-reasoning", cache: ResponseCache | None = None) -> OpenAIClient:
     """Get an OpenAI client instance with the specified model.
 
     Args:
         model_name (str, optional): The name of the model to use. Defaults to "grok-4-1-fast-reasoning".
+        cache (ResponseCache | None, optional): Persistent response cache. Defaults to the cache configured by LLM_CACHE_PATH, if any.
     Returns:
-        OpenAIClient: An instance of OpenAIClient configured with the specified model.
+        OpenAIClient: The shared OpenAIClient configured with the specified model.
     """
     grok_api_key = os.getenv("GROK_API_KEY")
-    client = OpenAIClient(api_key=grok_api_key, model=model_name, base_url="https://api.x.ai/v1")
+    client = get_client("grok", model_name, api_key=grok_api_key, base_url=GROK_BASE_URL, cache=cache)
     return client
 
 
-def get_openai_client(model_name: str = "gpt-4.1") -> OpenAIClient:
+def get_openai_client(model_name: str = "gpt-4.1", cache: ResponseCache | None = None) -> OpenAIClient:
     """Get an OpenAI client instance with the specified model.
 
     Args:
         model_name (str, optional): The name of the model to use. Defaults to "gpt-4.1".
+        cache (ResponseCache | None, optional): Persistent response cache. Defaults to the cache configured by LLM_CACHE_PATH, if any.
     Returns:
-        OpenAIClient: An instance of OpenAIClient configured with the specified model.
+        OpenAIClient: The shared OpenAIClient configured with the specified model.
     """
     openai_api_key = os.getenv("OPENAI_API_KEY")
-    client = OpenAIClient(api_key=openai_api_key, model=model_name)
-    return client
\ No newline at end of file
+    client = get_client("openai", model_name, api_key=openai_api_key, cache=cache)
+    return client
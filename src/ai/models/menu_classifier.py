@@ -2,4 +2,10 @@ from typing import Literal
 from pydantic import BaseModel
 
 class ClassificationResult(BaseModel):
-    menu_classification: Literal["structured", "unstructured"]
\ No newline at end of file
+    menu_classification: Literal["structured", "unstructured"]
+
+class DocumentClassification(ClassificationResult):
+    file_name: str
+
+class BatchClassificationResult(BaseModel):
+    classifications: list[DocumentClassification]
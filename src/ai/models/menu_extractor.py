@@ -16,4 +16,7 @@ class Restaurant(BaseModel):
     restaurant_name: str
     chef_name: str
     skills: List[Skill]
-    dishes: List[Dish]
\ No newline at end of file
+    dishes: List[Dish]
+
+class MenuSection(BaseModel):
+    dishes: List[Dish]
@@ -0,0 +1,18 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+
+class Constraint(BaseModel):
+    kind: Literal["ingredient", "technique", "planet", "restaurant", "chef_licence", "required_licence", "technique_category", "distance"]
+    name: str
+    licence_value: Optional[int]
+    operation: Optional[Literal["eq", "ne", "g", "ge", "l", "le"]]
+    max_distance: Optional[int]
+
+class ConstraintGroup(BaseModel):
+    any_of: List[Constraint]
+
+class QueryPlan(BaseModel):
+    supported: bool
+    include: List[ConstraintGroup]
+    exclude: List[ConstraintGroup]
@@ -32,6 +32,7 @@ Segui questi consigli:
 Quando l'utente richiede che lo chef abbia una certa licenza usa il tool: get_chef_licence_dish_ids
 Quando l'utente richiede piatti che per essere preparati richiedono certe licenze usa il tool: get_dish_from_minimum_licence
 Quanto l'utente chiede piatti appartenenti a una certa categoria di techniche usa il tool: get_dish_from_technique_category
+Quando la domanda combina più vincoli (ingredienti, tecniche, pianeti, ristoranti, licenze, categorie, distanze) usa il tool resolve_constraints passando tutti i vincoli in una sola chiamata: ritorna direttamente gli identificativi finali.
 
 Esempio quando usare get_dish_from_minimum_licence:
 Quali piatti preparati su <pianeta> richiedono la licenza <tipo_di_licenza> superiore a <valore> e includono <ingrediente>?
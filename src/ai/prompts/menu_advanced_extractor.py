@@ -50,4 +50,24 @@ Quando estrai i nomi dei piatti:
 INPUT_PROMPT = """
 Testo del menu:
 {menu_text}
-"""
\ No newline at end of file
+"""
+SECTION_EXTRACTOR_SYSTEM_PROMPT = """
+Tu sei un estrattore di informazioni.
+Ti verrà fornita una sezione di un menu inventato, che contiene solo una parte dei piatti.
+
+Devi estrarre la lista dei piatti presenti nella sezione: per ogni piatto estrarre il nome del piatto, la lista delle tecniche e la lista degli ingredienti.
+Se la sezione inizia a metà della descrizione di un piatto di cui non compare il nome, ignora quella parte.
+
+Rispondi in formato json.
+Ti riporto una lista non esaustiva di ingredienti e tecniche che potresti trovare nei menu riportale esattamente come sono scritte.
+Ingredienti:
+{list_ingredients_str}
+Tecniche:
+{list_techniques_str}
+...
+
+Mi raccomando ad identificare correttamente il nome del piatto, gli ingredienti e le tecniche.
+Quando estrai i nomi dei piatti:
+- Riporta tutto il nome completo es. "Galassie Infiammate: Sinfonia Cosmica in Sei Dimensioni" 
+- Non devi riportare Emoji
+"""
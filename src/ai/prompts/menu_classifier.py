@@ -8,4 +8,12 @@ Devi classificare ogni menu in due categorie:
 
 INPUT_PROMPT ="""Testo del menu:
 {menu_text}
-""" 
\ No newline at end of file
+""" 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Riceverai più menu, ognuno preceduto dal nome del file.
+Restituisci una classificazione per ogni menu, riportando esattamente il nome del file fornito.
+"""
+
+BATCH_DOCUMENT_PROMPT = """### File: {file_name}
+{menu_text}
+"""
@@ -0,0 +1,221 @@
+"""
+Per-question tracing of the agent loop: one span per LLM call and per tool call.
+
+Spans are recorded only while a `QuestionTrace` is active (see `QuestionTrace.activate`),
+so traced clients and tools cost a context-variable lookup otherwise. Traces
+can be exported as JSONL, one question per line.
+"""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from datapizza.core.clients.models import ClientResponse
+from datapizza.tools import Tool
+
+_current_trace: ContextVar["QuestionTrace | None"] = ContextVar("current_trace", default=None)
+
+
+class Span:
+    """A timed LLM call ("llm") or tool call ("tool")."""
+
+    def __init__(self, kind: str, name: str, start: float, arguments: dict | None = None):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.arguments = arguments
+        self.latency_ms: float | None = None
+        self.result_size: int | None = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 3),
+            "latency_ms": self.latency_ms,
+            "arguments": self.arguments,
+            "result_size": self.result_size,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "error": self.error,
+        }
+
+
+class QuestionTrace:
+    """The spans recorded while answering a single question."""
+
+    def __init__(self, question: str):
+        self.question = question
+        self.spans: list[Span] = []
+        self._started_at: float | None = None
+        self.wall_time: float | None = None
+        self.frozen = False
+
+    @contextmanager
+    def activate(self) -> Iterator["QuestionTrace"]:
+        """Record the spans of the traced clients and tools called inside the block into this trace."""
+
+        token = _current_trace.set(self)
+        self._started_at = time.perf_counter()
+        try:
+            yield self
+        finally:
+            if not self.frozen:
+                self.wall_time = time.perf_counter() - self._started_at
+            _current_trace.reset(token)
+
+    def freeze(self) -> None:
+        """
+        Stop recording: spans ending from now on are dropped and the wall time is fixed.
+
+        Used when a question is abandoned (e.g. on timeout) while its run goes on,
+        so that the trace keeps matching the summary reported for the question.
+        """
+        if not self.frozen:
+            self.wall_time = self._elapsed()
+            self.frozen = True
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+
+    def summary(self) -> dict:
+        """
+        Aggregate the spans of the trace.
+
+        Returns:
+            dict: Number of LLM turns and tool calls, wall time in seconds and token counts.
+        """
+        llm_spans = [span for span in self.spans if span.kind == "llm"]
+        prompt_tokens = sum(span.prompt_tokens for span in llm_spans)
+        completion_tokens = sum(span.completion_tokens for span in llm_spans)
+        return {
+            "turns": len(llm_spans),
+            "tool_calls": sum(span.kind == "tool" for span in self.spans),
+            "wall_time": round(self.wall_time if self.wall_time is not None else self._elapsed(), 3),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens": prompt_tokens + completion_tokens,
+        }
+
+    def to_dict(self) -> dict:
+        return {"question": self.question, **self.summary(), "spans": [span.to_dict() for span in self.spans]}
+
+
+@contextmanager
+def _span(kind: str, name: str, arguments: dict | None = None) -> Iterator[Span | None]:
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span = Span(kind, name, trace._elapsed(), arguments)
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        if not trace.frozen:
+            trace.spans.append(span)
+
+
+def _record_response(span: Span | None, response: Any) -> None:
+    if span is None or not isinstance(response, ClientResponse):
+        return
+    span.prompt_tokens = response.usage.prompt_tokens
+    span.completion_tokens = response.usage.completion_tokens
+    span.result_size = len(response.text or "")
+
+
+class TracedClient:
+    """Proxy of a datapizza client recording an "llm" span for every (async) invoke and structured response."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def invoke(self, *args, **kwargs) -> ClientResponse:
+        with _span("llm", "invoke") as span:
+            response = self._client.invoke(*args, **kwargs)
+            _record_response(span, response)
+        return response
+
+    async def a_invoke(self, *args, **kwargs) -> ClientResponse:
+        with _span("llm", "a_invoke") as span:
+            response = await self._client.a_invoke(*args, **kwargs)
+            _record_response(span, response)
+        return response
+
+    def structured_response(self, *args, **kwargs) -> ClientResponse:
+        with _span("llm", "structured_response") as span:
+            response = self._client.structured_response(*args, **kwargs)
+            _record_response(span, response)
+        return response
+
+    async def a_structured_response(self, *args, **kwargs) -> ClientResponse:
+        with _span("llm", "a_structured_response") as span:
+            response = await self._client.a_structured_response(*args, **kwargs)
+            _record_response(span, response)
+        return response
+
+
+def trace_tool(tool: Tool) -> Tool:
+    """
+    Return a copy of the tool recording a "tool" span (arguments, result size, latency) on every call.
+
+    Args:
+        tool (Tool): The tool to trace.
+
+    Returns:
+        Tool: A tool with the same name and schema.
+    """
+    func = tool.func
+
+    @wraps(func)
+    def traced(*args, **kwargs):
+        with _span("tool", tool.name, kwargs) as span:
+            result = func(*args, **kwargs)
+            if span is not None:
+                span.result_size = len(result) if isinstance(result, str) else len(str(result))
+        return result
+
+    return Tool(
+        func=traced,
+        name=tool.name,
+        description=tool.description,
+        end=tool.end_invoke,
+        properties=tool.properties,
+        required=tool.required,
+        strict=tool.strict,
+    )
+
+
+def trace_tools(tools: Iterable[Tool]) -> list[Tool]:
+    """Return traced copies of the tools (see `trace_tool`)."""
+
+    return [trace_tool(tool) for tool in tools]
+
+
+def export_traces(traces: Iterable[QuestionTrace], path: Path) -> None:
+    """
+    Write the traces as JSONL, one question per line.
+
+    Args:
+        traces (Iterable[QuestionTrace]): The traces to export.
+        path (Path): Output file, overwritten.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for trace in traces:
+            f.write(json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n")
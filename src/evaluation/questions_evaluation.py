@@ -1,13 +1,19 @@
 import csv
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from typing_extensions import Literal
 from datapizza.agents import Agent
 import pandas as pd
 
 from src.ai.agents.engine_hard import query_dish_ids
+from src.ai.agents.query_compiler import answer_question
+from src.ai.tracing import QuestionTrace, export_traces
 
+TRACE_COLUMNS = ["turns", "tool_calls", "wall_time", "tokens"]
 
 
 
@@ -83,18 +89,133 @@ def jaccard_score(set1: Set[int], set2: Set[int]) -> float:
     union = len(set1 | set2)
     return intersection / union if union != 0 else 0.0
 
-def evaluate_questions(agent: Agent, question_path: Path, ground_truth_path: Path, level: Literal["easy", "medium", "hard", "all"]) -> pd.DataFrame:
+def _answer_question(agent: Agent,
+                     question: str,
+                     use_query_compiler: bool,
+                     timeout: Optional[float],
+                     trace: QuestionTrace) -> Set[int]:
     """
-    Evaluate the agent on easy questions and return a DataFrame with predictions.
+    Answer a single question, enforcing the per-question timeout.
+
+    The question runs in a daemon thread: on timeout the thread is abandoned
+    (it cannot be interrupted), the trace is frozen and a TimeoutError is raised.
+    The abandoned run keeps its agent and may still make LLM calls (with their
+    retries), so the caller must not reuse that agent, and such runs are not
+    counted against max_workers.
+
+    Args:
+        agent (Agent): The agent answering the question.
+        question (str): The question text.
+        use_query_compiler (bool): Answer through the query compiler instead of the agent loop.
+        timeout (Optional[float]): Maximum seconds allowed for the question, None for no limit.
+        trace (QuestionTrace): Collects the LLM and tool calls made for the question.
+
+    Raises:
+        TimeoutError: If the question is not answered within timeout seconds.
+
+    Returns:
+        Set[int]: The predicted dish ids.
+    """
+    def run() -> Set[int]:
+        with trace.activate():
+            if use_query_compiler:
+                return answer_question(question=question, agent=agent)
+            return query_dish_ids(agent=agent, question=question)
+
+    if timeout is None:
+        return run()
+
+    outcome: Dict[str, object] = {}
+
+    def target() -> None:
+        try:
+            outcome["result"] = run()
+        except Exception as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        # The spans of the abandoned run would not match the row reported for the question
+        trace.freeze()
+        raise TimeoutError(f"Nessuna risposta entro {timeout} secondi.")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def _submit_questions(executor: ThreadPoolExecutor,
+                      questions: List[Tuple[int, str]],
+                      traces: List[QuestionTrace],
+                      agent_factory: Callable[[], Agent],
+                      use_query_compiler: bool,
+                      timeout: Optional[float]) -> List["Future[Set[int]]"]:
+    """
+    Submit every question to the thread pool and return the futures in question order.
+
+    Each worker thread lazily builds its own agent with agent_factory, since agents
+    hold conversation state; after a timeout the worker replaces its agent because
+    the abandoned run may still be using it.
+    """
+    local = threading.local()
+
+    def work(question: str, trace: QuestionTrace) -> Set[int]:
+        if getattr(local, "agent", None) is None:
+            local.agent = agent_factory()
+        try:
+            return _answer_question(local.agent, question, use_query_compiler, timeout, trace)
+        except TimeoutError:
+            local.agent = None
+            raise
+
+    return [executor.submit(work, question, trace) for (_, question), trace in zip(questions, traces)]
+
+
+def evaluate_questions(agent: Agent,
+                       question_path: Path,
+                       ground_truth_path: Path,
+                       level: Literal["easy", "medium", "hard", "all"],
+                       use_query_compiler: bool = False,
+                       max_workers: int = 1,
+                       timeout: Optional[float] = None,
+                       agent_factory: Optional[Callable[[], Agent]] = None,
+                       trace_path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Evaluate the agent on the questions of a level and return a DataFrame with predictions.
+
+    With max_workers > 1 the questions are answered concurrently, each worker using
+    an isolated agent built by agent_factory; results are collected in the original
+    row order, so the DataFrame is the same as in the sequential run.
+    After a timeout the next question gets a new agent from agent_factory. Timed-out
+    runs are abandoned, not stopped:
+    they keep running in the background, so with many timeouts more than
+    max_workers questions may be calling the LLM at the same time.
+    Every question is traced (see `src.ai.tracing`): the DataFrame reports LLM turns,
+    tool calls, wall time and tokens per question.
 
     Args:
-        agent (Agent): The agent to evaluate.
+        agent (Agent): The agent to evaluate (used in the sequential run).
         question_path (Path): Path to the CSV file containing questions.
         ground_truth_path (Path): Path to the CSV file containing ground truth data.
+        level (Literal["easy", "medium", "hard", "all"]): Difficulty level of the questions to evaluate.
+        use_query_compiler (bool, optional): Answer through the query compiler, falling back to the agent loop. Defaults to False.
+        max_workers (int, optional): Number of questions answered concurrently. Defaults to 1.
+        timeout (Optional[float], optional): Maximum seconds per question; slower questions score 0. Defaults to None.
+        agent_factory (Optional[Callable[[], Agent]], optional): Builds one agent per worker, and the agent replacing
+            a timed-out one. Required when max_workers > 1 or timeout is set.
+        trace_path (Optional[Path], optional): If set, the per-question spans are exported there as JSONL. Defaults to None.
+
+    Raises:
+        ValueError: If max_workers > 1 or timeout is set and no agent_factory is provided.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the predictions for easy questions.
+        pd.DataFrame: A DataFrame containing the predictions for the questions.
     """ 
+    if max_workers > 1 and agent_factory is None:
+        raise ValueError("agent_factory è obbligatorio con max_workers > 1: ogni worker richiede un agente isolato.")
+    if timeout is not None and agent_factory is None:
+        raise ValueError("agent_factory è obbligatorio con timeout: dopo un timeout serve un nuovo agente.")
 
     domande = _load_domande(question_path)
     ground_truth = _load_ground_truth(ground_truth_path)
@@ -106,30 +227,62 @@ def evaluate_questions(agent: Agent, question_path: Path, ground_truth_path: Pat
             (idx, question) for idx, question, difficulty in domande if difficulty.lower() == level.lower()
         ]
 
+    traces = [QuestionTrace(question) for _, question in questions]
+    executor = None
+    if max_workers > 1:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluation")
+        futures = _submit_questions(executor, questions, traces, agent_factory, use_query_compiler, timeout)
+        answers = [future.result for future in futures]
+    else:
+        current = {"agent": agent}
+
+        def answer_sequentially(question: str, trace: QuestionTrace) -> Set[int]:
+            try:
+                return _answer_question(current["agent"], question, use_query_compiler, timeout, trace)
+            except TimeoutError:
+                current["agent"] = agent_factory()
+                raise
+
+        answers = [partial(answer_sequentially, question, trace) for (_, question), trace in zip(questions, traces)]
+
     total = len(questions)
     predictions = []
     scores = 0.0
-    for idx, question in questions:
+    try:
+        for (idx, question), get_answer, trace in zip(questions, answers, traces):
 
-        expected = ground_truth.get(idx)
-        try: 
-            predicted = query_dish_ids(agent=agent, question=question)
-            score = jaccard_score(expected, predicted)
-            scores += score
-            predictions.append([idx, expected, predicted, score])
+            expected = ground_truth.get(idx)
+            try: 
+                predicted = get_answer()
+                score = jaccard_score(expected, predicted)
+                scores += score
 
-        except Exception as e:
-            print(f"Error processing question {idx}: {e}")
-            predictions.append([idx, expected, set(), 0.0])
-        print(f"  atteso:    {sorted(expected)}")
-        print(f"  predetto:  {sorted(predicted)}")
-        print(f"[{idx:03d}] {score:.2f} - {question}")
-        print("--------------------\n")
+            except Exception as e:
+                print(f"Error processing question {idx}: {e}")
+                predicted, score = set(), 0.0
+            summary = trace.summary()
+            predictions.append([idx, expected, predicted, score, *(summary[column] for column in TRACE_COLUMNS)])
+            print(f"  atteso:    {sorted(expected)}")
+            print(f"  predetto:  {sorted(predicted)}")
+            print(f"[{idx:03d}] {score:.2f} - {question}")
+            print("--------------------\n")
+    except BaseException:
+        # e.g. KeyboardInterrupt: do not start the questions still queued
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if trace_path is not None:
+        export_traces(traces, trace_path)
 
     accuracy = (scores / total) * 100
     print(f"\nAccuratezza Easy: ({accuracy:.2f}%)")
 
     predictions_df = pd.DataFrame(
-        predictions, columns=["row_id", "expected", "predicted", "score"]
+        predictions, columns=["row_id", "expected", "predicted", "score", *TRACE_COLUMNS]
     )
-    return predictions_df
\ No newline at end of file
+    return predictions_df
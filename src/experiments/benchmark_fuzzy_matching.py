@@ -0,0 +1,112 @@
+"""
+Benchmark of the fuzzy matchers on the real ingredient/technique vocabularies.
+
+Compares the exhaustive SequenceMatcher scan (the previous lookup path) with the
+trigram-indexed matcher on misspelled variants of the mapping keys.
+
+Usage:
+    python -m src.experiments.benchmark_fuzzy_matching --mappings-dir src/experiments/artifacts
+"""
+import random
+import time
+from pathlib import Path
+
+import click
+
+from src.ai.agents.fuzzy_matcher import SequenceMatcherScan, TrigramMatcher
+from src.evaluation import MAPPINGS_DIR
+from src.utils import normalize_key, read_json
+
+VOCABULARIES = ["ingredient_to_dishes.json", "technique_to_dishes.json"]
+
+
+def _misspell(text: str, rng: random.Random, edits: int) -> str:
+    """Apply random character deletions, substitutions and transpositions."""
+    chars = list(text)
+    for _ in range(edits):
+        if len(chars) < 2:
+            break
+        position = rng.randrange(len(chars) - 1)
+        edit = rng.choice(["delete", "substitute", "transpose"])
+        if edit == "delete":
+            del chars[position]
+        elif edit == "substitute":
+            chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    return "".join(chars)
+
+
+def _time_matcher(matcher, queries: list[str]) -> tuple[float, list[str | None]]:
+    start = time.perf_counter()
+    results = [matcher.best_match(query) for query in queries]
+    elapsed = time.perf_counter() - start
+    return elapsed, results
+
+
+def benchmark_vocabulary(keys: list[str], n_queries: int, edits: int, top_k: int, seed: int) -> dict:
+    """
+    Run both matchers on misspelled keys of a vocabulary.
+
+    Args:
+        keys (list[str]): The mapping keys.
+        n_queries (int): Number of misspelled queries to generate.
+        edits (int): Number of character edits applied to each query.
+        top_k (int): Number of trigram candidates scored by the trigram matcher.
+        seed (int): Random seed for query generation.
+
+    Returns:
+        dict: Timings, speedup and agreement between the two matchers.
+    """
+    rng = random.Random(seed)
+    choices = sorted({normalize_key(key) for key in keys})
+    targets = [rng.choice(choices) for _ in range(n_queries)]
+    queries = [_misspell(target, rng, edits) for target in targets]
+
+    build_start = time.perf_counter()
+    trigram = TrigramMatcher(choices, top_k=top_k)
+    build_time = time.perf_counter() - build_start
+    scan = SequenceMatcherScan(choices)
+
+    scan_time, scan_results = _time_matcher(scan, queries)
+    trigram_time, trigram_results = _time_matcher(trigram, queries)
+
+    agreement = sum(a == b for a, b in zip(scan_results, trigram_results)) / n_queries
+    scan_recall = sum(r == t for r, t in zip(scan_results, targets)) / n_queries
+    trigram_recall = sum(r == t for r, t in zip(trigram_results, targets)) / n_queries
+
+    return {
+        "vocabulary_size": len(choices),
+        "index_build_ms": build_time * 1000,
+        "scan_ms_per_query": scan_time / n_queries * 1000,
+        "trigram_ms_per_query": trigram_time / n_queries * 1000,
+        "speedup": scan_time / trigram_time if trigram_time else float("inf"),
+        "agreement": agreement,
+        "scan_recall": scan_recall,
+        "trigram_recall": trigram_recall,
+    }
+
+
+@click.command()
+@click.option("--mappings-dir", type=click.Path(exists=True, file_okay=False, path_type=Path), default=MAPPINGS_DIR, show_default=True, help="Directory containing the mapping JSON files.")
+@click.option("--queries", "n_queries", default=500, show_default=True, help="Number of misspelled queries per vocabulary.")
+@click.option("--edits", default=2, show_default=True, help="Character edits applied to each query.")
+@click.option("--top-k", default=10, show_default=True, help="Candidates scored by the trigram matcher.")
+@click.option("--seed", default=42, show_default=True, help="Random seed.")
+def main(mappings_dir: Path, n_queries: int, edits: int, top_k: int, seed: int) -> None:
+    """Compare SequenceMatcher full scans with the trigram matcher."""
+
+    for filename in VOCABULARIES:
+        mapping = read_json(mappings_dir / filename)
+        stats = benchmark_vocabulary(list(mapping), n_queries, edits, top_k, seed)
+        click.echo(f"{filename} ({stats['vocabulary_size']} keys)")
+        click.echo(f"  index build:        {stats['index_build_ms']:.2f} ms")
+        click.echo(f"  SequenceMatcher:    {stats['scan_ms_per_query']:.3f} ms/query")
+        click.echo(f"  Trigram (top {top_k}):   {stats['trigram_ms_per_query']:.3f} ms/query")
+        click.echo(f"  speedup:            {stats['speedup']:.1f}x")
+        click.echo(f"  agreement:          {stats['agreement']:.1%}")
+        click.echo(f"  recall scan/trigram: {stats['scan_recall']:.1%} / {stats['trigram_recall']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
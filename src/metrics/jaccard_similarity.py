@@ -1,7 +1,128 @@
+from itertools import chain, repeat
+
+import numpy as np
 import pandas as pd
 import pandas.api.types
 
 
+def string_to_list(value):
+    """Convert a string value to a list of integers."""
+    if pd.isna(value) or value == "":
+        return []
+    if isinstance(value, (int, float)):
+        return [int(value)]
+    return [int(x.strip()) for x in str(value).split(",")]
+
+
+def _flatten_lists(lists: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    rows = np.repeat(np.arange(len(lists), dtype=np.int64), lengths)
+    ids = np.fromiter(chain.from_iterable(lists), dtype=np.int64, count=int(lengths.sum()))
+    return rows, ids
+
+
+def _parse_id_column(values: pd.Series, accept_lists: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a column of comma-separated id strings into (row, id) pairs.
+
+    Columns of strings (or of numbers) are parsed in bulk; other columns go
+    through `string_to_list` cell by cell. With accept_lists, a column whose
+    cells are all lists is used as it is.
+
+    Args:
+    - values (pd.Series): The column to parse.
+    - accept_lists (bool): Whether a column of lists is accepted without conversion.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: Row positions and ids, one entry per id.
+    """
+    if pandas.api.types.is_numeric_dtype(values.dtype):
+        mask = values.notna().to_numpy()
+        rows = np.flatnonzero(mask)
+        return rows, values.to_numpy()[mask].astype(np.int64)
+
+    if pd.api.types.infer_dtype(values, skipna=True) == "string":
+        array = values.to_numpy(dtype=object)
+        non_empty = ~(values.isna().to_numpy() | (array == ""))
+        strings = array[non_empty].tolist()
+        counts = np.fromiter(map(str.count, strings, repeat(",")), dtype=np.int64, count=len(strings)) + 1
+        rows = np.repeat(np.flatnonzero(non_empty), counts)
+        # int() strips the whitespace around each id, as in string_to_list
+        tokens = ",".join(strings).split(",") if strings else []
+        ids = np.fromiter(map(int, tokens), dtype=np.int64, count=len(tokens))
+        return rows, ids
+
+    if accept_lists and all(isinstance(x, list) for x in values.dropna()):
+        return _flatten_lists(values.tolist())
+    return _flatten_lists([string_to_list(value) for value in values.tolist()])
+
+
+def _unique_keys(rows: np.ndarray, ids: np.ndarray, offset: int, width: int | None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Deduplicate (row, id) pairs.
+
+    With a width, each pair is encoded as the int key rows * width + (ids - offset);
+    without one (the keys would overflow int64), pairs are kept as a structured array.
+
+    Args:
+    - rows (np.ndarray): Row positions.
+    - ids (np.ndarray): Ids, one per row position.
+    - offset (int): Smallest id of both sets.
+    - width (int | None): Range of the ids of both sets, or None to skip the int encoding.
+
+    Returns:
+    - tuple[np.ndarray, np.ndarray]: The sorted unique keys and the row of each key.
+    """
+    if width is not None:
+        keys = np.unique(rows * width + (ids - offset))
+        return keys, keys // width
+    pairs = np.empty(len(rows), dtype=[("row", np.int64), ("id", np.int64)])
+    pairs["row"] = rows
+    pairs["id"] = ids
+    keys = np.unique(pairs)
+    return keys, keys["row"]
+
+
+def jaccard_rows(submission: tuple[np.ndarray, np.ndarray], solution: tuple[np.ndarray, np.ndarray], n_rows: int) -> np.ndarray:
+    """
+    Row-wise Jaccard similarity between two sparse (row, id) sets.
+
+    Each (row, id) pair is encoded as a single int key (or kept as a structured
+    pair when the key would overflow int64); after deduplication, keys present
+    in both sets are the intersections, so every count is a bincount over the
+    rows. Rows where both sets are empty score 1.
+
+    Args:
+    - submission (tuple[np.ndarray, np.ndarray]): Row positions and ids of the submission.
+    - solution (tuple[np.ndarray, np.ndarray]): Row positions and ids of the solution.
+    - n_rows (int): Number of rows.
+
+    Returns:
+    - np.ndarray: The Jaccard similarity of each row.
+    """
+    all_ids = np.concatenate([submission[1], solution[1]])
+    offset = int(all_ids.min()) if len(all_ids) else 0
+    width = int(all_ids.max()) - offset + 1 if len(all_ids) else 1
+    # Python ints: the check itself cannot overflow
+    if n_rows * width > np.iinfo(np.int64).max:
+        width = None
+
+    submission_keys, submission_rows = _unique_keys(*submission, offset, width)
+    solution_keys, solution_rows = _unique_keys(*solution, offset, width)
+    common_keys = np.intersect1d(submission_keys, solution_keys, assume_unique=True)
+    common_rows = common_keys // width if width is not None else common_keys["row"]
+
+    submission_sizes = np.bincount(submission_rows, minlength=n_rows)
+    solution_sizes = np.bincount(solution_rows, minlength=n_rows)
+    intersection = np.bincount(common_rows, minlength=n_rows)
+    union = submission_sizes + solution_sizes - intersection
+
+    similarities = np.ones(n_rows, dtype=np.float64)
+    non_empty = union > 0
+    similarities[non_empty] = intersection[non_empty] / union[non_empty]
+    return similarities
+
+
 def score(
     solution: pd.DataFrame, submission: pd.DataFrame, row_id_column_name: str
 ) -> float:
@@ -13,6 +134,10 @@ def score(
     The Jaccard similarity is computed as:
     J(A, B) = |A ∩ B| / |A ∪ B|
 
+    Ids are parsed in bulk into (row, id) arrays and the intersection/union
+    counts are computed with NumPy (see `jaccard_rows`), so the metric scales
+    to submissions with millions of rows.
+
     Args:
     - solution (pd.DataFrame): The dataframe containing the ground truth values.
     - submission (pd.DataFrame): The dataframe containing predictions as comma-separated strings.
@@ -21,67 +146,24 @@ def score(
     Returns:
     - float: The average Jaccard similarity over all rows.
     """
-    # Make copies to avoid modifying the original dataframes
-    solution = solution.copy()
-    submission = submission.copy()
-
     # Remove the row ID column to avoid affecting the metric
-    del solution[row_id_column_name]
-    del submission[row_id_column_name]
-
-    def string_to_list(value):
-        """Convert a string value to a list of integers."""
-        if pd.isna(value) or value == "":
-            return []
-        if isinstance(value, (int, float)):
-            return [int(value)]
-        return [int(x.strip()) for x in str(value).split(",")]
-
-    # Convert submission strings to lists
-    for col in submission.columns:
-        submission[col] = submission[col].apply(string_to_list)
+    solution = solution.drop(columns=row_id_column_name)
+    submission = submission.drop(columns=row_id_column_name)
 
-    # Convert solution values to lists if they aren't already
-    for col in solution.columns:
-        if col != "Usage":
-            if not all(isinstance(x, list) for x in solution[col].dropna()):
-                solution[col] = solution[col].apply(string_to_list)
-
-    # Check that all submission columns contain valid lists
-    for col in submission.columns:
-        if not pandas.api.types.is_object_dtype(submission[col]):
-            raise ValueError(f"Submission column {col} must contain lists of integers")
-        try:
-            # Check that all non-empty values are lists of integers
-            valid_lists = submission[col].apply(
-                lambda x: isinstance(x, list) and all(isinstance(i, int) for i in x)
-            )
-            if not valid_lists.all():
-                raise ValueError(
-                    f"Submission column {col} must contain valid lists of integers"
-                )
-        except Exception as e:
-            raise ValueError(f"Error processing column {col}: {str(e)}")
-
-    # Define a helper function for Jaccard similarity
-    def jaccard_similarity(list1, list2):
-        if not list1 and not list2:  # Both empty
-            return 1.0
-        set1 = set(list1)
-        set2 = set(list2)
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        return intersection / union if union != 0 else 0.0
+    # Rows are paired by index label, as in a Series.combine of the two columns
+    if not submission.index.equals(solution.index):
+        if not submission.index.sort_values().equals(solution.index.sort_values()):
+            raise ValueError("Submission and solution must contain the same rows")
+        solution = solution.reindex(submission.index)
 
     # Compute Jaccard similarity row-wise for all columns
-    similarities = []
+    n_rows = len(submission)
+    similarities = {}
     for col in submission.columns:
-        col_similarities = submission[col].combine(
-            solution[col],
-            func=lambda sub_list, sol_list: jaccard_similarity(sub_list, sol_list),
-        )
-        similarities.append(col_similarities)
+        submission_ids = _parse_id_column(submission[col])
+        solution_ids = _parse_id_column(solution[col], accept_lists=True)
+        similarities[col] = jaccard_rows(submission_ids, solution_ids, n_rows)
 
     # Calculate the average similarity across all rows and columns
-    overall_similarity = pd.concat(similarities, axis=1).mean().mean()
+    overall_similarity = pd.DataFrame(similarities, index=submission.index).mean().mean()
     return float(overall_similarity) * 100
@@ -1,7 +1,9 @@
-
-from urllib import response
 from datapizza.core.clients.models import ClientResponse
 
+# Defined with the engines that load the category index, re-exported for the notebooks
+from src.ai.agents.category_index import mapping_category_dishes
+
+
 def mapping_category_technique(response: ClientResponse) -> dict:
     """
     Map categories to their techniques from the extraction response.
@@ -12,7 +14,7 @@ def mapping_category_technique(response: ClientResponse) -> dict:
     Returns:
         dict: A dictionary mapping category names to their techniques.
     """
-    
+
     all_techniques = {}
     for category in response.structured_data[0].categories:
         all_techniques[category.category_name] = category.techniques
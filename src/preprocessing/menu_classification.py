@@ -1,24 +1,221 @@
-from typing import List
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 from tenacity import retry, stop_after_attempt
 
-from src.ai.models.menu_classifier import ClassificationResult
-from src.ai.prompts.menu_classifier import INPUT_PROMPT, SYSTEM_PROMPT
-from src.ai.clients import get_openai_client
+from src.ai.models.menu_classifier import BatchClassificationResult, ClassificationResult
+from src.ai.prompts.menu_classifier import BATCH_DOCUMENT_PROMPT, BATCH_SYSTEM_PROMPT, INPUT_PROMPT, SYSTEM_PROMPT
+from src.ai.clients import get_openai_client, rate_limit_wait
 
+# Structure (lists vs. prose) is evident from the first pages of a menu
+DEFAULT_SAMPLE_CHARS = 4000
 
-@retry(stop=stop_after_attempt(3))
-def classify_menu(text_extracted: dict, 
-                  model_name: str = "gpt-4.1", 
-                  system_prompt: str = SYSTEM_PROMPT, 
-                  input_prompt: str = INPUT_PROMPT) -> List[str]:
-    menus = {}
+# Structured menus list every dish as "Ingredienti" and "Tecniche" headers, each on its own line
+_INGREDIENTS_HEADER = re.compile(r"^\s*ingredienti\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+_TECHNIQUES_HEADER = re.compile(r"^\s*tecniche\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+_BULLET = re.compile(r"^\s*(?:[-•*·●▪◦–]|\d+[.)])\s+")
+# A menu is confidently structured with at least this many dishes laid out with both headers
+MIN_STRUCTURED_DISHES = 3
+# A menu without headers is confidently unstructured below this fraction of bulleted lines
+MAX_UNSTRUCTURED_BULLET_RATIO = 0.05
 
-    client = get_openai_client(model_name=model_name)
+
+def sample_menu_text(menu_text: str, max_chars: int | None = DEFAULT_SAMPLE_CHARS) -> str:
+    """
+    Return the part of a menu sent to the classifier.
+
+    Long menus are cut to max_chars: the first three quarters come from the
+    beginning of the menu and the rest from its middle, both cut at line boundaries.
+
+    Args:
+        menu_text (str): The menu text.
+        max_chars (int | None, optional): Maximum number of characters, None for the whole text. Defaults to 4000.
+
+    Returns:
+        str: The menu text, or a sample of it.
+    """
+    if max_chars is None or len(menu_text) <= max_chars:
+        return menu_text
+
+    head_chars = max_chars * 3 // 4
+    head = menu_text[:head_chars].rsplit("\n", 1)[0]
+    middle_start = menu_text.find("\n", len(menu_text) // 2) + 1
+    middle = menu_text[middle_start:middle_start + max_chars - head_chars].rsplit("\n", 1)[0]
+    return f"{head}\n[...]\n{middle}"
+
+
+def menu_layout_features(menu_text: str) -> dict:
+    """
+    Compute the layout signals used by `heuristic_classification`.
+
+    Args:
+        menu_text (str): The menu text.
+
+    Returns:
+        dict: Number of "Ingredienti" and "Tecniche" header lines and fraction of bulleted lines.
+    """
+    lines = [line for line in menu_text.splitlines() if line.strip()]
+    bullets = sum(bool(_BULLET.match(line)) for line in lines)
+    return {
+        "ingredients_headers": len(_INGREDIENTS_HEADER.findall(menu_text)),
+        "techniques_headers": len(_TECHNIQUES_HEADER.findall(menu_text)),
+        "bullet_ratio": bullets / len(lines) if lines else 0.0,
+    }
+
+
+def heuristic_classification(menu_text: str) -> str | None:
+    """
+    Classify a menu from its layout, without calling the LLM.
+
+    Args:
+        menu_text (str): The menu text.
+
+    Returns:
+        str | None: "structured" or "unstructured" when the layout is unambiguous, None otherwise.
+    """
+    features = menu_layout_features(menu_text)
+    headers = (features["ingredients_headers"], features["techniques_headers"])
+    if min(headers) >= MIN_STRUCTURED_DISHES:
+        return "structured"
+    if max(headers) == 0 and features["bullet_ratio"] < MAX_UNSTRUCTURED_BULLET_RATIO:
+        return "unstructured"
+    return None
+
+
+def heuristic_agreement(text_extracted: dict, classifications: dict) -> dict:
+    """
+    Compare the heuristic decisions with reference classifications, e.g. `menu_classifications.json`.
+
+    Args:
+        text_extracted (dict): A dictionary where keys are file names and values are menu texts.
+        classifications (dict): The reference classification of each menu.
+
+    Returns:
+        dict: Number of menus decided by the heuristic, of those agreeing with the reference,
+            and the ambiguous and disagreeing file names.
+    """
+    decided, agreeing, ambiguous, disagreeing = 0, 0, [], []
     for file_name, menu_text in text_extracted.items():
-        result = client.structured_response(system_prompt=system_prompt,
-                                            output_cls=ClassificationResult,
-                                            input=input_prompt.format(menu_text=menu_text))
-        menus[file_name] = result.structured_data[0].menu_classification
+        if file_name not in classifications:
+            continue
+        classification = heuristic_classification(menu_text)
+        if classification is None:
+            ambiguous.append(file_name)
+            continue
+        decided += 1
+        if classification == classifications[file_name]:
+            agreeing += 1
+        else:
+            disagreeing.append(file_name)
+    return {"decided": decided, "agreeing": agreeing, "ambiguous": ambiguous, "disagreeing": disagreeing}
+
+
+@retry(stop=stop_after_attempt(3), wait=rate_limit_wait)
+def _classify_document(menu_text: str, model_name: str, system_prompt: str, input_prompt: str) -> str:
+    client = get_openai_client(model_name=model_name)
+    result = client.structured_response(system_prompt=system_prompt,
+                                        output_cls=ClassificationResult,
+                                        input=input_prompt.format(menu_text=menu_text))
+    return result.structured_data[0].menu_classification
+
+
+@retry(stop=stop_after_attempt(3), wait=rate_limit_wait)
+def _classify_batch(menu_texts: dict, model_name: str, system_prompt: str) -> dict:
+    client = get_openai_client(model_name=model_name)
+    result = client.structured_response(
+        system_prompt=system_prompt,
+        output_cls=BatchClassificationResult,
+        input="\n".join(BATCH_DOCUMENT_PROMPT.format(file_name=file_name, menu_text=menu_text)
+                        for file_name, menu_text in menu_texts.items()),
+    )
+    classifications = {item.file_name: item.menu_classification for item in result.structured_data[0].classifications}
+    return {file_name: classifications[file_name] for file_name in menu_texts if file_name in classifications}
+
+
+def classify_menu(text_extracted: dict,
+                  model_name: str = "gpt-4.1",
+                  system_prompt: str = SYSTEM_PROMPT,
+                  input_prompt: str = INPUT_PROMPT,
+                  max_workers: int = 4,
+                  batch_size: int = 1,
+                  max_chars: int | None = DEFAULT_SAMPLE_CHARS,
+                  failures: dict | None = None,
+                  use_heuristics: bool = True,
+                  sources: dict | None = None) -> dict:
+    """
+    Classify menus as "structured" or "unstructured".
+
+    With use_heuristics, menus whose layout is unambiguous are classified
+    locally (see `heuristic_classification`) and only the others go to the LLM.
+    Only a sample of each menu is sent (see `sample_menu_text`). With
+    batch_size > 1, several menus are classified by a single call returning a
+    list of classifications; menus missing from a batch answer are classified
+    one by one. Calls run concurrently and are retried per document (or per
+    batch), so one failure does not re-classify the other menus.
+
+    Args:
+        text_extracted (dict): A dictionary where keys are file names and values are menu texts.
+        model_name (str, optional): The model used for classification. Defaults to "gpt-4.1".
+        system_prompt (str, optional): System prompt of the single-menu calls. Defaults to SYSTEM_PROMPT.
+        input_prompt (str, optional): Input prompt of the single-menu calls. Defaults to INPUT_PROMPT.
+        max_workers (int, optional): Maximum number of concurrent calls. Defaults to 4.
+        batch_size (int, optional): Number of menus per call. Defaults to 1.
+        max_chars (int | None, optional): Characters sent per menu, None for the whole text. Defaults to 4000.
+        failures (dict | None, optional): If provided, filled with {file name: error message} for the menus that could not be
+            classified, which are left out of the result; if None, the first failure is raised.
+        use_heuristics (bool, optional): Classify the menus with an unambiguous layout without the LLM. Defaults to True.
+        sources (dict | None, optional): If provided, filled with {file name: "heuristic" or "llm"} for the classified menus.
+
+    Raises:
+        RuntimeError: If a menu cannot be classified and failures is None.
+
+    Returns:
+        dict: The classification of each successfully classified menu, in input order.
+    """
+    classified = {}
+    if use_heuristics:
+        for file_name, menu_text in text_extracted.items():
+            classification = heuristic_classification(menu_text)
+            if classification is not None:
+                classified[file_name] = classification
+        print(f"{len(classified)} menus classified from their layout, {len(text_extracted) - len(classified)} left to the LLM.")
+
+    samples = {file_name: sample_menu_text(menu_text, max_chars) for file_name, menu_text in text_extracted.items()
+               if file_name not in classified}
+    file_names = list(samples)
+    if sources is not None:
+        sources.update({file_name: "heuristic" for file_name in classified})
+    batches = [file_names[i:i + batch_size] for i in range(0, len(file_names), batch_size)] if batch_size > 1 else []
+
+    def classify_one(file_name: str) -> str:
+        return _classify_document(samples[file_name], model_name, system_prompt, input_prompt)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batch_futures = [executor.submit(_classify_batch, {name: samples[name] for name in batch}, model_name, BATCH_SYSTEM_PROMPT)
+                         for batch in batches]
+        single_futures = {} if batches else {file_name: executor.submit(classify_one, file_name) for file_name in file_names}
+
+        for batch, future in zip(batches, batch_futures):
+            try:
+                classified.update(future.result())
+            except Exception as e:
+                print(f"Batch classification failed, classifying its menus one by one: {e}")
+            for file_name in batch:
+                if file_name in classified and sources is not None:
+                    sources[file_name] = "llm"
+                if file_name not in classified:
+                    single_futures[file_name] = executor.submit(classify_one, file_name)
+
+        for file_name, future in single_futures.items():
+            try:
+                classified[file_name] = future.result()
+                if sources is not None:
+                    sources[file_name] = "llm"
+            except Exception as e:
+                # Without failures, a missing classification would silently drop the menu from extraction
+                if failures is None:
+                    raise RuntimeError(f"Classification failed for document: {file_name}") from e
+                print(f"Classification failed for document: {file_name}: {e}")
+                failures[file_name] = str(e)
 
-    return menus
+    return {file_name: classified[file_name] for file_name in text_extracted if file_name in classified}
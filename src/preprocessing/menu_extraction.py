@@ -1,42 +1,232 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from datapizza.core.clients.models import ClientResponse
 
 from src.ai.agents.extractor import extraction_call
-from src.ai.prompts.menu_advanced_extractor import EXTRACTOR_SYSTEM_PROMPT
+from src.ai.models.menu_extractor import MenuSection, Restaurant
+from src.ai.prompts.menu_advanced_extractor import EXTRACTOR_SYSTEM_PROMPT, SECTION_EXTRACTOR_SYSTEM_PROMPT
+from src.utils import normalize_key
+
+# Dish titles are short lines, without final punctuation, that follow the end of a paragraph
+_DISH_TITLE_MAX_WORDS = 8
+_SENTENCE_END = (".", "!", "?", "»", "\"", "”")
+_TITLE_INVALID_END = (".", ",", ";", ":", "!", "?", "»", "\"", "”", ")", "'", "’")
+_VOCABULARY_TOKEN = re.compile(r"\w{4,}")
+
+
+def _restaurant(response: ClientResponse) -> dict:
+    return response.structured_data[0].model_dump()
+
+
+def _extract_menus(documents: dict, extract: Callable[[str], dict], max_workers: int = 1, failures: dict | None = None) -> dict:
+    """
+    Run an extraction call on every document with bounded concurrency.
+
+    Results keep the order of the document keys; documents whose extraction
+    fails (after the retries of `extraction_call`) are skipped and reported in
+    failures, or raised after the other documents when failures is None.
+
+    Args:
+        documents (dict): A dictionary where keys are document identifiers and values are menu texts.
+        extract (Callable[[str], dict]): The extraction applied to each menu text, returning the restaurant.
+        max_workers (int, optional): Maximum number of concurrent extraction calls. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
 
+    Raises:
+        RuntimeError: If a document cannot be extracted and failures is None.
 
-def extract_structured_info_from_menus(documents: dict, model_name: str = "gpt-4.1") -> list:
+    Returns:
+        dict: The extracted restaurants by document key, in document order.
+    """
+    errors: dict[str, Exception] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {key: executor.submit(extract, menu_text) for key, menu_text in documents.items()}
+
+        restaurants = {}
+        for key, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Extraction failed for document: {key}: {e}")
+                errors[key] = e
+                continue
+            print(f"Info from document: {key} has been extracted.")
+            restaurants[key] = result
+
+    if failures is not None:
+        failures.update({key: str(e) for key, e in errors.items()})
+    elif errors:
+        # Without failures, a missing restaurant would silently drop the menu from every mapping
+        raise RuntimeError(f"Extraction failed for documents: {', '.join(errors)}") from next(iter(errors.values()))
+    return restaurants
+
+
+def extract_structured_info_by_document(documents: dict, model_name: str = "gpt-4.1", max_workers: int = 1, failures: dict | None = None) -> dict:
+    """
+    Extract information from a set of menu documents, keyed by document.
+
+    Args:
+        documents (dict): A dictionary where keys are document identifiers and values are menu texts.
+        model_name (str, optional): The name of the model to use for extraction. Defaults to "gpt-4.1".
+        max_workers (int, optional): Maximum number of concurrent extraction calls. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
+
+    Returns:
+        dict: The extracted restaurant of each successfully processed document.
+    """
+    return _extract_menus(
+        documents,
+        lambda text: _restaurant(extraction_call(text=text, model_name=model_name)),
+        max_workers=max_workers,
+        failures=failures,
+    )
+
+
+def extract_structured_info_from_menus(documents: dict, model_name: str = "gpt-4.1", max_workers: int = 1, failures: dict | None = None) -> list:
     """
     Extract information from a set of menu documents.
 
     Args:
         documents (dict): A dictionary where keys are document identifiers and values are menu texts.
         model_name (str, optional): The name of the model to use for extraction. Defaults to "grok-4-1-fast-reasoning".
+        max_workers (int, optional): Maximum number of concurrent extraction calls. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
 
     Returns:
         dict: A dictionary containing extracted information from the menus.
     """
-    restaurants = []
+    return list(extract_structured_info_by_document(documents, model_name=model_name, max_workers=max_workers, failures=failures).values())
 
-    for key, menu_text in documents.items():
-        result = extraction_call(text=menu_text, model_name=model_name)
-        print(f"Info from document: {key} has been extracted.")
-        restaurants.append(result.structured_data[0].model_dump())
-    
-    return restaurants
 
+def _is_dish_title(lines: list[str], index: int) -> bool:
+    line = lines[index]
+    stripped = line.strip()
+    # Wrapped lines of a paragraph keep their trailing space
+    if not stripped or line != line.rstrip() or not stripped[0].isupper():
+        return False
+    if len(stripped.split()) > _DISH_TITLE_MAX_WORDS or stripped.endswith(_TITLE_INVALID_END):
+        return False
+    previous = next((previous_line.strip() for previous_line in reversed(lines[:index]) if previous_line.strip()), "")
+    return previous.endswith(_SENTENCE_END)
 
-def extract_unstructured_info_from_menus(documents: dict, ingredients: list[str], techniques: list[str], model_name: str = "gpt-4.1") -> dict:
+
+def split_menu_text(menu_text: str, max_chars: int = 6000) -> list[str]:
     """
-    Extract information from a set of menu documents using provided ingredients and techniques.
+    Split a menu into segments of at most max_chars characters, cut before dish titles.
+
+    Dishes are never split: a dish longer than max_chars makes a segment on its
+    own. The first segment holds the restaurant presentation (planet, chef,
+    licenses) and the first dishes.
+
+    Args:
+        menu_text (str): The menu text.
+        max_chars (int, optional): Target size of a segment. Defaults to 6000.
+
+    Returns:
+        list[str]: The segments, in menu order. A single segment if the menu is short or no dish title is found.
+    """
+    if len(menu_text) <= max_chars:
+        return [menu_text]
+
+    lines = menu_text.split("\n")
+    starts = [0] + [index for index in range(1, len(lines)) if _is_dish_title(lines, index)] + [len(lines)]
+    blocks = ["\n".join(lines[start:end]) for start, end in zip(starts, starts[1:])]
+
+    segments = []
+    for block in blocks:
+        if segments and len(segments[-1]) + len(block) + 1 <= max_chars:
+            segments[-1] += "\n" + block
+        else:
+            segments.append(block)
+    return segments
+
+
+def _vocabulary_in_text(vocabulary: list[str], text: str) -> list[str]:
+    """Keep the vocabulary entries sharing at least one word of four or more letters with the text."""
+
+    words = set(_VOCABULARY_TOKEN.findall(normalize_key(text)))
+    return [entry for entry in vocabulary if words.intersection(_VOCABULARY_TOKEN.findall(normalize_key(entry)))]
+
+
+def merge_restaurant_sections(restaurant: dict, sections: list[dict]) -> dict:
+    """
+    Merge the dishes extracted from the segments of a menu into its restaurant.
+
+    Dishes with the same (normalized) name are merged, keeping the first name
+    and the union of ingredients and techniques in order of appearance.
+
+    Args:
+        restaurant (dict): The restaurant extracted from the first segment.
+        sections (list[dict]): The `MenuSection` extracted from the other segments.
+
+    Returns:
+        dict: The restaurant with the dishes of every segment.
+    """
+    dishes: dict[str, dict] = {}
+    for dish in restaurant.get("dishes", []) + [dish for section in sections for dish in section.get("dishes", [])]:
+        merged = dishes.setdefault(normalize_key(dish["dish_name"]), {"dish_name": dish["dish_name"], "ingredients": [], "techniques": []})
+        for field in ("ingredients", "techniques"):
+            merged[field].extend(value for value in dish.get(field, []) if value not in merged[field])
+    return {**restaurant, "dishes": list(dishes.values())}
+
+
+def _extract_menu_in_segments(menu_text: str, ingredients: list[str], techniques: list[str], model_name: str,
+                              max_chars: int, max_workers: int) -> dict:
+    """
+    Extract a menu segment by segment (see `split_menu_text`), with concurrent calls.
+
+    The first segment is extracted as a `Restaurant`, the others as a
+    `MenuSection`; each prompt only lists the vocabulary entries sharing a word with its segment.
+    """
+
+    def extract_segment(index: int, segment: str) -> dict:
+        system_prompt = (EXTRACTOR_SYSTEM_PROMPT if index == 0 else SECTION_EXTRACTOR_SYSTEM_PROMPT).format(
+            list_ingredients_str="\n".join(f"- {ingredient}" for ingredient in _vocabulary_in_text(ingredients, segment)),
+            list_techniques_str="\n".join(f"- {technique}" for technique in _vocabulary_in_text(techniques, segment)),
+        )
+        output_cls = Restaurant if index == 0 else MenuSection
+        return _restaurant(extraction_call(text=segment, system_prompt=system_prompt, model_name=model_name, output_cls=output_cls))
+
+    segments = split_menu_text(menu_text, max_chars=max_chars)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(extract_segment, range(len(segments)), segments))
+    return merge_restaurant_sections(results[0], results[1:])
+
+
+def extract_unstructured_info_by_document(documents: dict, ingredients: list[str], techniques: list[str], model_name: str = "gpt-4.1", max_workers: int = 1, failures: dict | None = None,
+                                          chunk_chars: int | None = None, chunk_workers: int = 4) -> dict:
+    """
+    Extract information from a set of menu documents using provided ingredients and techniques, keyed by document.
+
+    With chunk_chars, menus longer than chunk_chars are split at dish titles
+    and their segments are extracted concurrently, then merged into one restaurant.
+
     Args:
         documents (dict): A dictionary where keys are document identifiers and values are menu texts.
         ingredients (list[str]): A list of ingredients to consider during extraction.
         techniques (list[str]): A list of techniques to consider during extraction.
         model_name (str, optional): The name of the model to use for extraction. Defaults to "gpt-4.1".
+        max_workers (int, optional): Maximum number of concurrent extraction calls. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
+        chunk_chars (int | None, optional): Maximum size of a segment, None to extract each menu in one call. Defaults to None.
+        chunk_workers (int, optional): Maximum number of concurrent segment calls per menu. Defaults to 4.
+
     Returns:
-        dict: A dictionary containing extracted information from the menus.
+        dict: The extracted restaurant of each successfully processed document.
     """
-
-    restaurants = []
+    if chunk_chars is not None:
+        return _extract_menus(
+            documents,
+            lambda text: _extract_menu_in_segments(text, ingredients, techniques, model_name, chunk_chars, chunk_workers),
+            max_workers=max_workers,
+            failures=failures,
+        )
 
     list_ingredients_str = "\n".join(f"- {ingredient}" for ingredient in ingredients)
     list_techniques_str = "\n".join(f"- {technique}" for technique in techniques)
@@ -46,12 +236,39 @@ def extract_unstructured_info_from_menus(documents: dict, ingredients: list[str]
         list_techniques_str=list_techniques_str
     )
 
-    for key, menu_text in documents.items():
-        result = extraction_call(text=menu_text,system_prompt=system_prompt, model_name=model_name)
-        print(f"Info from document: {key} has been extracted.")
-        restaurants.append(result.structured_data[0].model_dump())
-    
-    return restaurants
+    return _extract_menus(
+        documents,
+        lambda text: _restaurant(extraction_call(text=text, system_prompt=system_prompt, model_name=model_name)),
+        max_workers=max_workers,
+        failures=failures,
+    )
+
+
+def extract_unstructured_info_from_menus(documents: dict, ingredients: list[str], techniques: list[str], model_name: str = "gpt-4.1", max_workers: int = 1, failures: dict | None = None,
+                                         chunk_chars: int | None = None) -> dict:
+    """
+    Extract information from a set of menu documents using provided ingredients and techniques.
+    Args:
+        documents (dict): A dictionary where keys are document identifiers and values are menu texts.
+        ingredients (list[str]): A list of ingredients to consider during extraction.
+        techniques (list[str]): A list of techniques to consider during extraction.
+        model_name (str, optional): The name of the model to use for extraction. Defaults to "gpt-4.1".
+        max_workers (int, optional): Maximum number of concurrent extraction calls. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
+        chunk_chars (int | None, optional): Extract long menus in segments of this size (see `extract_unstructured_info_by_document`). Defaults to None.
+    Returns:
+        dict: A dictionary containing extracted information from the menus.
+    """
+    return list(extract_unstructured_info_by_document(
+        documents,
+        ingredients=ingredients,
+        techniques=techniques,
+        model_name=model_name,
+        max_workers=max_workers,
+        failures=failures,
+        chunk_chars=chunk_chars,
+    ).values())
 
 def filter_structured_or_unstructured_menus(documents: dict, classifications: dict, structured: bool = True) -> dict:
     """
@@ -96,7 +313,8 @@ def extract_ingredients_and_techniques_from_menus(documents: list) -> tuple[list
 
     return list_ingredients, list_techniques
 
-def extract_info_from_menus(documents: dict, classifications: dict, model_name: str = "gpt-4.1") -> dict:
+def extract_info_from_menus(documents: dict, classifications: dict, model_name: str = "gpt-4.1", max_workers: int = 1, failures: dict | None = None,
+                            chunk_chars: int | None = None) -> dict:
     """
     Extract information from menus based on their classification.
 
@@ -104,6 +322,13 @@ def extract_info_from_menus(documents: dict, classifications: dict, model_name:
         documents (dict): A dictionary where keys are document identifiers and values are menu texts.
         classifications (dict): A dictionary where keys are document identifiers and values are their classifications ("structured" or "unstructured").
         model_name (str, optional): The name of the model to use for extraction. Defaults to "grok-4-1-fast-reasoning".
+        max_workers (int, optional): Maximum number of concurrent extraction calls per phase. Defaults to 1.
+        failures (dict | None, optional): If provided, filled with {document key: error message} for the failed documents;
+            if None, a RuntimeError is raised once the other documents are extracted.
+        chunk_chars (int | None, optional): Extract long unstructured menus in segments of this size. Defaults to None.
+
+    Raises:
+        RuntimeError: If a menu cannot be extracted and failures is None.
 
     Returns:
         dict: A dictionary containing extracted information from the menus.
@@ -115,8 +340,9 @@ def extract_info_from_menus(documents: dict, classifications: dict, model_name:
 
     if structured_menus:
         print("Extracting info from structured menus...")
-        extracted_info = extract_structured_info_from_menus(structured_menus, model_name=model_name)
+        extracted_info = extract_structured_info_from_menus(structured_menus, model_name=model_name, max_workers=max_workers, failures=failures)
     
+    # The vocabulary of the unstructured phase needs every structured menu to be extracted first.
     ingredients, techniques = extract_ingredients_and_techniques_from_menus(extracted_info)
 
     if unstructured_menus:
@@ -125,7 +351,10 @@ def extract_info_from_menus(documents: dict, classifications: dict, model_name:
             unstructured_menus,
             ingredients=ingredients,
             techniques=techniques,
-            model_name=model_name
+            model_name=model_name,
+            max_workers=max_workers,
+            failures=failures,
+            chunk_chars=chunk_chars,
         )
         extracted_info.extend(extracted_unstructured_info)
 
@@ -1,25 +1,71 @@
+import os
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
-from llama_index.core import SimpleDirectoryReader
+from typing import Iterator, Optional
+from llama_index.core import Document, SimpleDirectoryReader
 
+from src.preprocessing.parsed_text_cache import ParsedTextCache, get_default_parsed_text_cache
 
 
-def parse_documents_in_directory(document_path: Optional[Path] = None, file_path: Optional[Path] = None) -> list:
+def _list_files(document_path: Optional[Path], file_path: Optional[list[Path]]) -> list[Path]:
+    if file_path:
+        return [Path(path) for path in file_path]
+    # Same files as SimpleDirectoryReader(input_dir=...): non-recursive, hidden files excluded
+    return sorted(path for path in Path(document_path).iterdir() if path.is_file() and not path.name.startswith("."))
+
+
+def _sorted_pages(pages_list: list) -> list:
+    return sorted(pages_list, key=lambda x: int(x.metadata.get('page_label', 0)))
+
+
+def _cache_pages(cache: ParsedTextCache, file_path: Path, key: str, pages_list: list) -> None:
+    cache.put(file_path, [(page.metadata.get('page_label'), page.text) for page in _sorted_pages(pages_list)], key=key)
+
+
+def parse_documents_in_directory(document_path: Optional[Path] = None, file_path: Optional[Path] = None, use_cache: bool = True) -> list:
     """
     Parse documents in the given directory and save the concatenated output as a JSON file.
 
+    Files whose content is in the parsed-text cache (see `parsed_text_cache.py`)
+    are not parsed again: their pages are rebuilt from the cached text.
+
     Args:
         document_path (Path): Path to the directory containing the documents.
+        file_path (list[Path], optional): Files to parse, used instead of document_path.
+        use_cache (bool, optional): Read and fill the parsed-text cache. Defaults to True.
     Returns:
         list: List of parsed document objects. Each element is a page of a specific document.
     """
-    if file_path:
-        reader = SimpleDirectoryReader(input_files=file_path)
-    else:
-        reader = SimpleDirectoryReader(input_dir=document_path)
-    documents = reader.load_data()
-    
+    if not use_cache:
+        if file_path:
+            reader = SimpleDirectoryReader(input_files=file_path)
+        else:
+            reader = SimpleDirectoryReader(input_dir=document_path)
+        return reader.load_data()
+
+    cache = get_default_parsed_text_cache()
+    files = _list_files(document_path, file_path)
+    keys = {path: cache.key(path) for path in files}
+    cached = {path: cache.get(path, key=keys[path]) for path in files}
+
+    to_parse = [path for path in files if cached[path] is None]
+    pages_by_file = defaultdict(list)
+    if to_parse:
+        for page in SimpleDirectoryReader(input_files=to_parse).load_data():
+            pages_by_file[page.metadata.get('file_name', 'unknown_file')].append(page)
+        for path in to_parse:
+            _cache_pages(cache, path, keys[path], pages_by_file[path.name])
+
+    documents = []
+    for path in files:
+        if cached[path] is None:
+            documents.extend(pages_by_file[path.name])
+            continue
+        documents.extend(
+            Document(text=page_text, metadata={"file_path": str(path), "file_name": path.name, "page_label": page_label})
+            for page_label, page_text in cached[path].pages()
+        )
     return documents
 
 
@@ -41,8 +87,71 @@ def group_and_concatenate_documents(documents: list) -> dict:
         docs_by_file[file_name].append(doc)
 
     for file_name, pages_list in docs_by_file.items():
-        pages_list.sort(key=lambda x: int(x.metadata.get('page_label', 0)))
-        full_text = "\n".join([page.text for page in pages_list])
+        full_text = "\n".join([page.text for page in _sorted_pages(pages_list)])
         final_output[file_name] = full_text
     
-    return final_output
\ No newline at end of file
+    return final_output
+
+
+def _parse_and_concatenate_file(file_path: Path, cache: Optional[ParsedTextCache], key: Optional[str]) -> tuple[str, str]:
+    """Parse a single file and return its name and the concatenated text of its pages."""
+
+    pages = SimpleDirectoryReader(input_files=[file_path]).load_data()
+    if cache is not None:
+        _cache_pages(cache, file_path, key, pages)
+    concatenated = group_and_concatenate_documents(pages)
+    # A file without pages (e.g. an empty PDF) still yields an entry
+    file_name, text = next(iter(concatenated.items()), (Path(file_path).name, ""))
+    return file_name, text
+
+
+def stream_documents_in_directory(document_path: Optional[Path] = None,
+                                  file_path: Optional[list[Path]] = None,
+                                  max_workers: Optional[int] = None,
+                                  use_cache: bool = True) -> Iterator[tuple[str, str]]:
+    """
+    Parse documents in a process pool, yielding each file as soon as it is parsed.
+
+    Streaming counterpart of `parse_documents_in_directory` followed by
+    `group_and_concatenate_documents`: every worker parses a whole file and
+    returns its concatenated text, and at most max_workers files are in flight,
+    so peak memory is bounded by the pool size rather than by the corpus size.
+    Files are yielded in completion order, not in directory order; files found
+    in the parsed-text cache are yielded first, without starting the pool.
+
+    Args:
+        document_path (Path, optional): Path to the directory containing the documents.
+        file_path (list[Path], optional): Files to parse, used instead of document_path.
+        max_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        use_cache (bool, optional): Read and fill the parsed-text cache. Defaults to True.
+
+    Yields:
+        tuple[str, str]: The file name and the concatenated text content of the file.
+    """
+    cache = get_default_parsed_text_cache() if use_cache else None
+    keys = {}
+    files = []
+    for path in _list_files(document_path, file_path):
+        if cache is None:
+            files.append(path)
+            continue
+        keys[path] = cache.key(path)
+        cached = cache.get(path, key=keys[path])
+        if cached is None:
+            files.append(path)
+        else:
+            yield cached.file_name, cached.text
+    if not files:
+        return
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(files))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending_files = iter(files)
+        running = {executor.submit(_parse_and_concatenate_file, path, cache, keys.get(path)) for _, path in zip(range(max_workers), pending_files)}
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                next_path = next(pending_files, None)
+                if next_path is not None:
+                    running.add(executor.submit(_parse_and_concatenate_file, next_path, cache, keys.get(next_path)))
+                yield future.result()
@@ -2,26 +2,25 @@ import json
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple, Union
-from difflib import SequenceMatcher
 
+from src.ai.agents.mapping_index import MappingIndex
 
-def _find_most_similar_dish(dish_mapping: dict, dish_name: str) -> str | None:
-    """Find the most similar dish name in dish_mapping using fuzzy matching."""
-    if not dish_name:
-        return None
-    
-    normalized_name = dish_name.strip().lower()
-    best_match = None
-    best_score = 0.0
-    
-    for key in dish_mapping.keys():
-        score = SequenceMatcher(None, normalized_name, key.lower()).ratio()
-        if score > best_score:
-            best_match = key
-            best_score = score
-    
-    # Return the match only if similarity is above a threshold (e.g., 0.6)
-    return best_match if best_score > 0.6 else None
+# Minimum similarity for a fuzzy dish-name match to be accepted
+DISH_MATCH_THRESHOLD = 0.6
+
+
+def _resolve_dish_id(dish_index: MappingIndex[int], dish_name: str) -> int | None:
+    """Resolve a dish name to its id: normalized exact match first, then fuzzy matching."""
+    dish_key = dish_index.resolve(dish_name, fuzzy=False)
+    if dish_key is not None:
+        return dish_index.mapping[dish_key]
+
+    similar_dish = dish_index.resolve(dish_name)
+    if similar_dish:
+        dish_id = dish_index.mapping[similar_dish]
+        print(f"Fuzzy match: '{dish_name}' -> '{similar_dish}' (ID: {dish_id})")
+        return dish_id
+    return None
 
 def _collect_technique_ingredient(extracted_info: object) -> Iterable[Dict]:
     """
@@ -53,23 +52,18 @@ def create_mappings_technique_ingredient(extracted_info: Union[list,dict], dish_
     technique_to_dishes: Dict[str, List[str]] = defaultdict(list)
     ingredient_to_dishes: Dict[str, List[str]] = defaultdict(list)
     
+    dish_index = MappingIndex(dish_mapping, fuzzy_threshold=DISH_MATCH_THRESHOLD)
+
     # Iterate through dishes regardless of the input structure
     for dish in _collect_technique_ingredient(extracted_info):
-        dish_name = dish.get("dish_name").replace('’', "'")
+        dish_name = dish.get("dish_name")
                                                   
         if not dish_name:
             continue
         
-        dish_id = dish_mapping.get(dish_name, None)
-        
-        # If no exact match, try fuzzy matching
+        dish_id = _resolve_dish_id(dish_index, dish_name)
         if dish_id is None:
-            similar_dish = _find_most_similar_dish(dish_mapping, dish_name)
-            if similar_dish:
-                dish_id = dish_mapping[similar_dish]
-                print(f"Fuzzy match: '{dish_name}' -> '{similar_dish}' (ID: {dish_id})")
-            else:
-                continue  # Skip dishes that can't be matched
+            continue  # Skip dishes that can't be matched
         
         for technique in dish.get("techniques", []):
             if dish_id not in technique_to_dishes[technique]:
@@ -122,22 +116,17 @@ def create_mappings_planets_restaurant_skills(extracted_info: Union[list,dict],
     restaurant_to_dishes: Dict[str, List[int]] = defaultdict(list)
     skill_to_dishes: Dict[str, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(list))
     
+    dish_index = MappingIndex(dish_mapping, fuzzy_threshold=DISH_MATCH_THRESHOLD)
+
     # Iterate through dishes with metadata
     for dish_data in _collect_dishes_planets_restaurant_skills(extracted_info):
-        dish_name = dish_data.get("dish_name").replace('’', "'")
+        dish_name = dish_data.get("dish_name")
         if not dish_name:
             continue
 
-        dish_id = dish_mapping.get(dish_name, None)
-        
-        # If no exact match, try fuzzy matching
+        dish_id = _resolve_dish_id(dish_index, dish_name)
         if dish_id is None:
-            similar_dish = _find_most_similar_dish(dish_mapping, dish_name)
-            if similar_dish:
-                dish_id = dish_mapping[similar_dish]
-                print(f"Fuzzy match: '{dish_name}' -> '{similar_dish}' (ID: {dish_id})")
-            else:
-                continue  # Skip dishes that can't be matched
+            continue  # Skip dishes that can't be matched
         
         # Map planet -> dishes
         planet_name = dish_data.get("planet_name")
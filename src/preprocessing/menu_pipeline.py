@@ -0,0 +1,279 @@
+"""
+Incremental driver of the menu preprocessing pipeline.
+
+Runs parse -> classify -> extract -> map over a menu folder, storing a content
+hash and the output of every stage for each PDF in a state file. On re-run only
+new or changed documents go through the LLM stages, and the mapping JSONs are
+rebuilt by merging the cached per-document contributions.
+"""
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from src.ai.agents.category_index import CATEGORY_DISHES_FILE, mapping_category_dishes
+from src.preprocessing.menu_classification import classify_menu
+from src.preprocessing.menu_extraction import (
+    extract_ingredients_and_techniques_from_menus,
+    extract_structured_info_by_document,
+    extract_unstructured_info_by_document,
+)
+from src.preprocessing.menu_ingestion import stream_documents_in_directory
+from src.preprocessing.parsed_text_cache import file_fingerprint
+from src.preprocessing.menu_mapping import create_mappings_planets_restaurant_skills, create_mappings_technique_ingredient
+from src.utils import read_json, write_json
+
+PIPELINE_STATE_FILE = "menu_pipeline_state.json"
+FLAT_MAPPINGS = ["ingredient_to_dishes", "technique_to_dishes", "planet_to_dishes", "restaurant_to_dishes"]
+LEVEL_MAPPINGS = ["skill_to_dishes"]
+# Documents processed between two writes of the state file
+STATE_SAVE_INTERVAL = 10
+
+
+def _json_fingerprint(data: object) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _document_mappings(restaurant: dict, dish_mapping: dict) -> dict:
+    """Build the mapping contribution of a single extracted restaurant."""
+
+    ingredient_to_dishes, technique_to_dishes = create_mappings_technique_ingredient([restaurant], dish_mapping)
+    planet_to_dishes, restaurant_to_dishes, skill_to_dishes = create_mappings_planets_restaurant_skills([restaurant], dish_mapping)
+    return {
+        "ingredient_to_dishes": dict(ingredient_to_dishes),
+        "technique_to_dishes": dict(technique_to_dishes),
+        "planet_to_dishes": dict(planet_to_dishes),
+        "restaurant_to_dishes": dict(restaurant_to_dishes),
+        # Levels are stored as strings, as in the JSON written by the batch pipeline
+        "skill_to_dishes": {
+            skill: {str(level): ids for level, ids in levels.items()}
+            for skill, levels in skill_to_dishes.items()
+        },
+    }
+
+
+def _merge_flat(contributions: Iterable[dict]) -> dict:
+    merged: dict[str, list[int]] = {}
+    for contribution in contributions:
+        for name, dish_ids in contribution.items():
+            target = merged.setdefault(name, [])
+            target.extend(dish_id for dish_id in dish_ids if dish_id not in target)
+    return merged
+
+
+def _merge_levels(contributions: Iterable[dict]) -> dict:
+    merged: dict[str, dict[str, list[int]]] = {}
+    for contribution in contributions:
+        for name, levels in contribution.items():
+            merged_levels = merged.setdefault(name, {})
+            for level, dish_ids in levels.items():
+                target = merged_levels.setdefault(level, [])
+                target.extend(dish_id for dish_id in dish_ids if dish_id not in target)
+    return merged
+
+
+def _ordered_documents(documents: dict) -> list[str]:
+    """Structured menus first, then unstructured ones, as in `extract_info_from_menus`."""
+
+    structured = [name for name, entry in documents.items() if entry.get("classification") == "structured"]
+    unstructured = [name for name, entry in documents.items() if entry.get("classification") == "unstructured"]
+    return structured + unstructured
+
+
+def run_incremental_pipeline(menus_path: Path,
+                             artifacts_path: Path,
+                             dish_mapping: dict,
+                             model_name: str = "gpt-4.1",
+                             max_workers: int = 1,
+                             reextract_on_vocabulary_change: bool = False,
+                             parse_workers: int | None = None,
+                             chunk_chars: int | None = None) -> dict:
+    """
+    Run the menu preprocessing pipeline, re-processing only new or changed PDFs.
+
+    The state file in artifacts_path keeps, for each PDF, its content hash and
+    the output of every stage (text, classification, extraction, mapping
+    contribution). Stages whose output is missing are re-run, so documents that
+    failed in a previous run are retried. The mapping JSONs, `parsed_menus.json`,
+    `menu_classifications.json` and `extracted_menu_info.json` are rewritten
+    from the cached outputs without further LLM calls.
+
+    PDFs are parsed in a process pool (see `stream_documents_in_directory`) and
+    each parsed document is classified and, if structured, extracted while the
+    following ones are still parsing. Unstructured menus are extracted only once
+    every structured menu is done, since their prompt uses the vocabulary of
+    the structured ones. The state file is written every STATE_SAVE_INTERVAL
+    documents and at the end of each stage.
+
+    Args:
+        menus_path (Path): Directory containing the menu PDFs.
+        artifacts_path (Path): Directory where the state file and the mapping JSONs are written.
+        dish_mapping (dict): The dish name -> dish id mapping.
+        model_name (str, optional): The model used for classification and extraction. Defaults to "gpt-4.1".
+        max_workers (int, optional): Maximum number of documents classified or extracted at the same time. Defaults to 1.
+        reextract_on_vocabulary_change (bool, optional): Re-extract unstructured menus whenever the vocabulary
+            built from the structured menus changes. Defaults to False.
+        parse_workers (int | None, optional): Number of processes parsing the PDFs. Defaults to the number of CPUs.
+        chunk_chars (int | None, optional): Extract long unstructured menus in segments of this size. Defaults to None.
+
+    Returns:
+        dict: Summary of the run with the "processed", "unchanged", "removed" and "failed" documents.
+    """
+    artifacts_path.mkdir(parents=True, exist_ok=True)
+    state_path = artifacts_path / PIPELINE_STATE_FILE
+    state = read_json(state_path) if state_path.exists() else {}
+    documents: dict = state.get("documents", {})
+
+    # 1. Fingerprints: drop removed documents and reset the changed ones
+    pdf_paths = {path.name: path for path in sorted(Path(menus_path).glob("*.pdf"))}
+    removed = [name for name in documents if name not in pdf_paths]
+    for name in removed:
+        del documents[name]
+
+    changed = []
+    for name, path in pdf_paths.items():
+        fingerprint = file_fingerprint(path)
+        if documents.get(name, {}).get("fingerprint") != fingerprint:
+            documents[name] = {"fingerprint": fingerprint}
+            changed.append(name)
+    documents = {name: documents[name] for name in pdf_paths}
+
+    dish_mapping_fingerprint = _json_fingerprint(dish_mapping)
+    if state.get("dish_mapping_fingerprint") != dish_mapping_fingerprint:
+        for entry in documents.values():
+            entry.pop("mappings", None)
+
+    def save_state() -> None:
+        write_json({"dish_mapping_fingerprint": dish_mapping_fingerprint, "documents": documents}, state_path)
+
+    # 2-4a. Parsing, classification and structured extraction, overlapped: each document is
+    # classified (and extracted, if structured) as soon as its text is available, while
+    # the following PDFs are still being parsed
+    failures: dict = {}
+
+    def classify_and_extract(name: str, text: str, classification: str | None, extracted: bool) -> dict:
+        updates: dict = {}
+        if classification is None:
+            sources: dict = {}
+            classified = classify_menu(text_extracted={name: text}, model_name=model_name, failures=failures, sources=sources)
+            if name not in classified:
+                return updates
+            classification = classified[name]
+            updates.update(classification=classification, classification_source=sources.get(name))
+        if classification == "structured" and not extracted:
+            restaurants = extract_structured_info_by_document({name: text}, model_name=model_name, failures=failures)
+            if name in restaurants:
+                updates["extraction"] = restaurants[name]
+        return updates
+
+    futures: dict[str, Future] = {}
+    unsaved = 0
+
+    def collect(done_only: bool) -> None:
+        nonlocal unsaved
+        for name, future in list(futures.items()):
+            if done_only and not future.done():
+                continue
+            del futures[name]
+            try:
+                updates = future.result()
+            except Exception as e:
+                print(f"Processing failed for document: {name}: {e}")
+                failures[name] = str(e)
+                continue
+            documents[name].update(updates)
+            if "extraction" in updates:
+                documents[name].pop("mappings", None)
+            unsaved += 1
+        # The state holds every text: save every few documents, not after each one
+        if unsaved >= STATE_SAVE_INTERVAL:
+            save_state()
+            unsaved = 0
+
+    def submit(executor: ThreadPoolExecutor, name: str) -> None:
+        entry = documents[name]
+        if "classification" not in entry or (entry["classification"] == "structured" and "extraction" not in entry):
+            futures[name] = executor.submit(classify_and_extract, name, entry["text"], entry.get("classification"), "extraction" in entry)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for name, entry in documents.items():
+            if "text" in entry:
+                submit(executor, name)
+
+        to_parse = [name for name, entry in documents.items() if "text" not in entry]
+        if to_parse:
+            print(f"Parsing {len(to_parse)} documents...")
+            for name, text in stream_documents_in_directory(file_path=[pdf_paths[name] for name in to_parse], max_workers=parse_workers):
+                documents[name]["text"] = text
+                unsaved += 1
+                submit(executor, name)
+                collect(done_only=True)
+        collect(done_only=False)
+    save_state()
+
+    structured_info = [
+        documents[name]["extraction"] for name in documents
+        if documents[name].get("classification") == "structured" and "extraction" in documents[name]
+    ]
+    ingredients, techniques = extract_ingredients_and_techniques_from_menus(structured_info)
+    ingredients, techniques = sorted(ingredients), sorted(techniques)
+    vocabulary_fingerprint = _json_fingerprint([ingredients, techniques])
+
+    to_extract = {
+        name: entry["text"] for name, entry in documents.items()
+        if entry.get("classification") == "unstructured" and (
+            "extraction" not in entry
+            or (reextract_on_vocabulary_change and entry.get("vocabulary_fingerprint") != vocabulary_fingerprint)
+        )
+    }
+    if to_extract:
+        print(f"Extracting info from {len(to_extract)} unstructured menus...")
+        extracted = extract_unstructured_info_by_document(
+            to_extract,
+            ingredients=ingredients,
+            techniques=techniques,
+            model_name=model_name,
+            max_workers=max_workers,
+            failures=failures,
+            chunk_chars=chunk_chars,
+        )
+        for name, restaurant in extracted.items():
+            documents[name]["extraction"] = restaurant
+            documents[name]["vocabulary_fingerprint"] = vocabulary_fingerprint
+            documents[name].pop("mappings", None)
+        save_state()
+
+    # 5. Mapping contributions of the new extractions
+    for entry in documents.values():
+        if "extraction" in entry and "mappings" not in entry:
+            entry["mappings"] = _document_mappings(entry["extraction"], dish_mapping)
+    save_state()
+
+    # 6. Merge the per-document outputs into the pipeline artifacts
+    ordered = [name for name in _ordered_documents(documents) if "extraction" in documents[name]]
+    for mapping_name in FLAT_MAPPINGS:
+        merged = _merge_flat(documents[name]["mappings"][mapping_name] for name in ordered)
+        write_json(merged, artifacts_path / f"{mapping_name}.json")
+    for mapping_name in LEVEL_MAPPINGS:
+        merged = _merge_levels(documents[name]["mappings"][mapping_name] for name in ordered)
+        write_json(merged, artifacts_path / f"{mapping_name}.json")
+
+    # The category index joins the Manuale categories with the techniques just rewritten; the engines load it
+    category_path = artifacts_path / "category_to_techniques.json"
+    if category_path.exists():
+        technique_to_dishes = read_json(artifacts_path / "technique_to_dishes.json")
+        write_json(mapping_category_dishes(read_json(category_path), technique_to_dishes), artifacts_path / CATEGORY_DISHES_FILE)
+
+    write_json({name: entry["text"] for name, entry in documents.items() if "text" in entry}, artifacts_path / "parsed_menus.json")
+    write_json({name: entry["classification"] for name, entry in documents.items() if "classification" in entry}, artifacts_path / "menu_classifications.json")
+    write_json([documents[name]["extraction"] for name in ordered], artifacts_path / "extracted_menu_info.json")
+
+    summary = {
+        "processed": changed,
+        "unchanged": [name for name in documents if name not in changed],
+        "removed": removed,
+        "failed": failures,
+    }
+    print(f"Processed {len(changed)} documents, {len(summary['unchanged'])} unchanged, {len(removed)} removed, {len(failures)} failed.")
+    return summary
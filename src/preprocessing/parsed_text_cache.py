@@ -0,0 +1,121 @@
+"""
+On-disk cache of parsed PDF text, keyed by the SHA-256 of the file content.
+
+Each entry stores the `group_and_concatenate_documents` text of a file as
+gzip-compressed text, plus a JSON file with the page labels and the offset of
+every page in the text, so that the pages can be rebuilt without parsing.
+"""
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from src.utils import read_json, write_json
+
+# Bump when the parser or the concatenation changes, so that old entries are ignored
+PARSED_TEXT_CACHE_VERSION = 2
+DEFAULT_PARSED_TEXT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "parsed_text"
+
+
+def file_fingerprint(file_path: Path) -> str:
+    """Return the SHA-256 of the file content."""
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CachedDocument:
+    """The parsed text of a file, split back into its pages."""
+
+    def __init__(self, file_name: str, text: str, page_labels: list[str], offsets: list[int]):
+        self.file_name = file_name
+        self.text = text
+        self.page_labels = page_labels
+        self.offsets = offsets
+
+    def pages(self) -> list[tuple[str, str]]:
+        """
+        Return the pages of the document.
+
+        Returns:
+            list[tuple[str, str]]: Page label and page text, in page order.
+        """
+        # Pages are joined by a newline, which is not part of the page text
+        ends = [offset - 1 for offset in self.offsets[1:]] + [len(self.text)]
+        return [(label, self.text[start:end]) for label, start, end in zip(self.page_labels, self.offsets, ends)]
+
+
+class ParsedTextCache:
+    """Directory of parsed texts, two files per entry: `<key>.txt.gz` and `<key>.json`."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_PARSED_TEXT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def key(self, file_path: Path) -> str:
+        return f"v{PARSED_TEXT_CACHE_VERSION}-{file_fingerprint(file_path)}"
+
+    def get(self, file_path: Path, key: str | None = None) -> CachedDocument | None:
+        """
+        Return the cached text of a file, or None if the file content was never parsed.
+
+        Args:
+            file_path (Path): The parsed file.
+            key (str | None, optional): The cache key of the file, if already computed. Defaults to None.
+
+        Returns:
+            CachedDocument | None: The cached document, named after the current file name.
+        """
+        key = key or self.key(file_path)
+        text_path = self.cache_dir / f"{key}.txt.gz"
+        metadata_path = self.cache_dir / f"{key}.json"
+        if not (text_path.exists() and metadata_path.exists()):
+            return None
+        try:
+            metadata = read_json(metadata_path)
+            # Bytes, not text mode: newline translation would move the page offsets
+            with gzip.open(text_path, "rb") as f:
+                text = f.read().decode("utf-8")
+        except (OSError, EOFError, ValueError):
+            # Truncated or corrupted entry: parse the file again
+            return None
+        return CachedDocument(Path(file_path).name, text, metadata["page_labels"], metadata["offsets"])
+
+    def put(self, file_path: Path, pages: list[tuple[str, str]], key: str | None = None) -> None:
+        """
+        Store the pages of a parsed file.
+
+        Args:
+            file_path (Path): The parsed file.
+            pages (list[tuple[str, str]]): Page label and page text, in page order.
+            key (str | None, optional): The cache key of the file, if already computed. Defaults to None.
+        """
+        key = key or self.key(file_path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        offsets, position = [], 0
+        for _, page_text in pages:
+            offsets.append(position)
+            position += len(page_text) + 1
+        text = "\n".join(page_text for _, page_text in pages)
+
+        # Write to temporary files first, so that readers never see a partial entry
+        text_path = self.cache_dir / f"{key}.txt.gz"
+        metadata_path = self.cache_dir / f"{key}.json"
+        suffix = f".{os.getpid()}.tmp"
+        with gzip.open(text_path.with_name(text_path.name + suffix), "wb") as f:
+            f.write(text.encode("utf-8"))
+        write_json(
+            {"file_name": Path(file_path).name, "page_labels": [label for label, _ in pages], "offsets": offsets},
+            metadata_path.with_name(metadata_path.name + suffix),
+        )
+        os.replace(text_path.with_name(text_path.name + suffix), text_path)
+        os.replace(metadata_path.with_name(metadata_path.name + suffix), metadata_path)
+
+
+def get_default_parsed_text_cache() -> ParsedTextCache:
+    """Return the cache in PARSED_TEXT_CACHE_DIR, by default `.cache/parsed_text` in the project root."""
+
+    return ParsedTextCache(os.getenv("PARSED_TEXT_CACHE_DIR") or DEFAULT_PARSED_TEXT_CACHE_DIR)
@@ -0,0 +1,163 @@
+"""
+HTTP service answering questions with the Hard engine, kept warm between requests.
+
+Endpoints:
+    POST /query        {"question": "..."}
+    POST /query:batch  {"questions": ["...", ...]}
+    GET  /health
+    GET  /stats
+
+Mappings are loaded at startup and a single stateless agent serves every
+request through `a_query_dish_ids`; a semaphore bounds the questions in flight.
+Answers are cached by normalized question (see `answer_cache.py`).
+A single query answers 504 when it times out and 500 when the agent fails.
+
+Usage:
+    python -m src.service.app --port 8000 --max-concurrency 32
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable
+
+import click
+from datapizza.agents import Agent
+from pydantic import BaseModel, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.ai.agents.answer_cache import AnswerCache
+from src.ai.agents.engine_hard import a_query_dish_ids, get_agent, preload_mappings
+from src.ai.prompts.hard_engine import SYSTEM_PROMPT
+
+
+class QueryRequest(BaseModel):
+    question: str = Field(min_length=1)
+
+
+class BatchQueryRequest(BaseModel):
+    questions: list[str] = Field(min_length=1)
+
+
+def _default_agent_factory() -> Agent:
+    return get_agent(system_prompt=SYSTEM_PROMPT)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def create_app(agent_factory: Callable[[], Agent] | None = None,
+               max_concurrency: int = 32,
+               timeout: float | None = None,
+               preload: bool = True,
+               cache_answers: bool = True) -> Starlette:
+    """
+    Build the ASGI app.
+
+    Args:
+        agent_factory (Callable[[], Agent] | None, optional): Builds the agent at startup; pass an agent with a
+            stubbed client to run the service without an LLM. Defaults to the Hard engine agent.
+        max_concurrency (int, optional): Maximum number of questions answered at the same time. Defaults to 32.
+        timeout (float | None, optional): Maximum seconds per question, None for no limit. Defaults to None.
+        preload (bool, optional): Load the mappings at startup. Defaults to True.
+        cache_answers (bool, optional): Serve repeated and paraphrased questions from an AnswerCache. Defaults to True.
+
+    Returns:
+        Starlette: The ASGI application.
+    """
+    agent_factory = agent_factory or _default_agent_factory
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        if preload:
+            start = time.perf_counter()
+            try:
+                preload_mappings()
+                print(f"Mappings preloaded in {_elapsed_ms(start)} ms.")
+            except FileNotFoundError as e:
+                print(f"Mappings not preloaded, they will be loaded on first use: {e}")
+        app.state.agent = agent_factory()
+        app.state.semaphore = asyncio.Semaphore(max_concurrency)
+        app.state.answer_cache = AnswerCache() if cache_answers else None
+        yield
+
+    async def answer(app: Starlette, question: str) -> tuple[dict, int]:
+        """Return the answer to question and the HTTP status of a single query for it."""
+
+        start = time.perf_counter()
+        answer_cache: AnswerCache | None = app.state.answer_cache
+        dish_ids = answer_cache.get(question) if answer_cache is not None else None
+        if dish_ids is not None:
+            return {"question": question, "dish_ids": sorted(dish_ids), "cached": True, "elapsed_ms": _elapsed_ms(start)}, 200
+
+        try:
+            async with app.state.semaphore:
+                dish_ids = await asyncio.wait_for(a_query_dish_ids(question, app.state.agent), timeout)
+        except asyncio.TimeoutError:
+            return {"question": question, "error": f"No answer within {timeout} seconds.", "elapsed_ms": _elapsed_ms(start)}, 504
+        except Exception as e:
+            return {"question": question, "error": str(e), "elapsed_ms": _elapsed_ms(start)}, 500
+
+        if answer_cache is not None:
+            answer_cache.put(question, dish_ids)
+        return {"question": question, "dish_ids": sorted(dish_ids), "cached": False, "elapsed_ms": _elapsed_ms(start)}, 200
+
+    async def parse(request: Request, model: type[BaseModel]) -> BaseModel | JSONResponse:
+        try:
+            return model.model_validate(await request.json())
+        except ValueError as e:
+            errors = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+            return JSONResponse({"error": "Invalid request body.", "details": errors}, status_code=422)
+
+    async def query(request: Request) -> JSONResponse:
+        body = await parse(request, QueryRequest)
+        if isinstance(body, JSONResponse):
+            return body
+        result, status_code = await answer(request.app, body.question)
+        return JSONResponse(result, status_code=status_code)
+
+    async def query_batch(request: Request) -> JSONResponse:
+        body = await parse(request, BatchQueryRequest)
+        if isinstance(body, JSONResponse):
+            return body
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(answer(request.app, question) for question in body.questions))
+        # Failed questions are reported in their result, the batch itself succeeds
+        return JSONResponse({"results": [result for result, _ in answers], "elapsed_ms": _elapsed_ms(start)})
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+
+    async def stats(request: Request) -> JSONResponse:
+        answer_cache: AnswerCache | None = request.app.state.answer_cache
+        return JSONResponse({"answer_cache": answer_cache.stats() if answer_cache is not None else None})
+
+    return Starlette(
+        routes=[
+            Route("/query", query, methods=["POST"]),
+            Route("/query:batch", query_batch, methods=["POST"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/stats", stats, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Bind address.")
+@click.option("--port", default=8000, show_default=True, help="Bind port.")
+@click.option("--max-concurrency", default=32, show_default=True, help="Maximum number of questions answered at the same time.")
+@click.option("--timeout", type=float, default=None, help="Maximum seconds per question.")
+def main(host: str, port: int, max_concurrency: int, timeout: float | None) -> None:
+    """Serve the Hard engine over HTTP."""
+
+    import uvicorn
+
+    uvicorn.run(create_app(max_concurrency=max_concurrency, timeout=timeout), host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,4 +26,20 @@ def write_json(data: dict, file_path: Path) -> None:
     """
 
     with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+def normalize_key(name: str) -> str:
+    """
+    Normalize a name so that mapping builders and lookups agree on keys.
+
+    Lowercases the text, unifies typographic apostrophes and collapses whitespace.
+
+    Args:
+        name (str): The name to normalize.
+
+    Returns:
+        str: The normalized name.
+    """
+
+    name = name.replace("’", "'").replace("‘", "'")
+    return " ".join(name.lower().split())
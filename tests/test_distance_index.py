@@ -0,0 +1,24 @@
+import json
+
+from src.ai.agents import engine_hard
+from src.ai.agents.mapping_store import MappingStore
+
+
+def _write_distances(path, distance: int) -> None:
+    path.write_text(f"/,Tatooine,Asgard\nTatooine,0,{distance}\nAsgard,{distance},0\n", encoding="utf-8")
+
+
+def test_planet_distance_index_follows_distances_file(tmp_path, monkeypatch):
+    (tmp_path / "planet_to_dishes.json").write_text(json.dumps({"Tatooine": [1, 2], "Asgard": [3]}), encoding="utf-8")
+    distances_file = tmp_path / "Distanze.csv"
+    _write_distances(distances_file, 695)
+    monkeypatch.setattr(engine_hard, "mapping_store", MappingStore(tmp_path))
+    monkeypatch.setattr(engine_hard, "DISTANCES_FILE", distances_file)
+
+    _, dish_ids = engine_hard.dishes_within_distance("Tatooine", 0)
+    assert dish_ids.to_list() == [1, 2]
+
+    _write_distances(distances_file, 0)
+
+    _, dish_ids = engine_hard.dishes_within_distance("Tatooine", 0)
+    assert dish_ids.to_list() == [1, 2, 3]
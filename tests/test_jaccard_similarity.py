@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics.jaccard_similarity import score, string_to_list
+
+
+def _reference_score(solution: pd.DataFrame, submission: pd.DataFrame, row_id_column_name: str) -> float:
+    """The previous implementation of `score`, one Python set per row."""
+
+    solution = solution.drop(columns=row_id_column_name)
+    submission = submission.drop(columns=row_id_column_name)
+    for col in submission.columns:
+        submission[col] = submission[col].apply(string_to_list)
+    for col in solution.columns:
+        if not all(isinstance(x, list) for x in solution[col].dropna()):
+            solution[col] = solution[col].apply(string_to_list)
+
+    def jaccard_similarity(list1, list2):
+        if not list1 and not list2:
+            return 1.0
+        set1, set2 = set(list1), set(list2)
+        return len(set1 & set2) / len(set1 | set2)
+
+    similarities = [submission[col].combine(solution[col], func=jaccard_similarity) for col in submission.columns]
+    return float(pd.concat(similarities, axis=1).mean().mean()) * 100
+
+
+def _random_ids(rng: np.random.Generator, low: int, high: int) -> list[int]:
+    return rng.integers(low, high, size=rng.integers(0, 6)).tolist()
+
+
+def _id_string(rng: np.random.Generator, ids: list[int]) -> str:
+    # Whitespace around the ids is accepted by the metric
+    separators = [",", ", ", " ,", " , "]
+    text = str(ids[0]) if ids else ""
+    for dish_id in ids[1:]:
+        text += separators[rng.integers(len(separators))] + str(dish_id)
+    return text
+
+
+def _random_frames(seed: int, n_rows: int, low: int = 0, high: int = 30) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    row_ids = np.arange(1, n_rows + 1)
+
+    submission_cells, solution_cells = [], []
+    for _ in range(n_rows):
+        ids = _random_ids(rng, low, high)
+        # Some rows repeat ids, or are missing altogether
+        if ids and rng.random() < 0.2:
+            ids = ids + ids[:1]
+        submission_cells.append(np.nan if rng.random() < 0.1 else _id_string(rng, ids))
+        solution_cells.append(_id_string(rng, _random_ids(rng, low, high)))
+
+    submission = pd.DataFrame({"row_id": row_ids, "result": submission_cells})
+    solution = pd.DataFrame({"row_id": row_ids, "result": solution_cells})
+    return solution, submission
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_on_string_columns(seed):
+    solution, submission = _random_frames(seed, n_rows=200)
+
+    assert score(solution, submission, "row_id") == pytest.approx(_reference_score(solution, submission, "row_id"))
+
+
+def test_matches_reference_on_list_and_numeric_columns():
+    solution, submission = _random_frames(seed=42, n_rows=100)
+    solution["result"] = solution["result"].apply(string_to_list)
+    rng = np.random.default_rng(0)
+    submission["single"] = [np.nan if rng.random() < 0.2 else float(rng.integers(0, 5)) for _ in range(len(submission))]
+    solution["single"] = rng.integers(0, 5, size=len(solution)).astype(str)
+
+    assert score(solution, submission, "row_id") == pytest.approx(_reference_score(solution, submission, "row_id"))
+
+
+def test_matches_reference_with_ids_that_overflow_the_int_keys():
+    # Ids spanning most of int64 cannot be packed in a single row * width + id key
+    solution, submission = _random_frames(seed=7, n_rows=50, low=-(10**18), high=10**18)
+
+    assert score(solution, submission, "row_id") == pytest.approx(_reference_score(solution, submission, "row_id"))
+
+
+def test_matches_reference_with_shuffled_rows():
+    solution, submission = _random_frames(seed=3, n_rows=60)
+    submission = submission.sample(frac=1, random_state=0)
+
+    assert score(solution, submission, "row_id") == pytest.approx(_reference_score(solution, submission, "row_id"))
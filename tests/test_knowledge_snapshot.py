@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+
+from src.ai.agents.knowledge_snapshot import SNAPSHOT_FILE, KnowledgeSnapshot, build_snapshot, resolve_snapshot
+
+MAPPINGS = {
+    "ingredient_to_dishes": {"Farina di Luna": [0, 4, 7], "Sale Cosmico": [], "Polvere di Stelle": [12]},
+    "skill_to_dishes": {"Psionica (P)": {"1": [1, 2], "3": [5]}, "Gravitazionale (G)": {"0": []}},
+    "licence_to_techniques": {"Psionica (P)": {"2": ["Taglio Quantico", "Cottura àlla Luce"]}},
+    "restaurant_to_dishes": {},
+}
+
+
+def _write_sources(directory, distance: int = 3):
+    for name, mapping in MAPPINGS.items():
+        (directory / f"{name}.json").write_text(json.dumps(mapping, ensure_ascii=False), encoding="utf-8")
+    distances_file = directory / "Distanze.csv"
+    distances_file.write_text(f"/,Asgard,Ego\nAsgard,0,{distance}\nEgo,{distance},0\n", encoding="utf-8")
+    return distances_file
+
+
+def test_round_trip(tmp_path):
+    distances_file = _write_sources(tmp_path)
+
+    version = build_snapshot(tmp_path, distances_file)
+    snapshot = KnowledgeSnapshot(resolve_snapshot(tmp_path / SNAPSHOT_FILE))
+
+    assert snapshot.version == version
+    for name, mapping in MAPPINGS.items():
+        assert snapshot.has_mapping(name)
+        assert snapshot.mapping(name) == mapping
+    assert not snapshot.has_mapping("planet_to_dishes")
+
+    matrix = snapshot.distance_matrix()
+    assert matrix.planets == ["Asgard", "Ego"]
+    np.testing.assert_array_equal(matrix.distances, [[0, 3], [3, 0]])
+
+
+def test_snapshot_without_distances(tmp_path):
+    _write_sources(tmp_path)
+
+    build_snapshot(tmp_path, tmp_path / "missing.csv")
+    snapshot = KnowledgeSnapshot(resolve_snapshot(tmp_path / SNAPSHOT_FILE))
+
+    assert not snapshot.has_distances()
+    assert snapshot.distance_matrix() is None
+
+
+def test_rebuild_switches_pointer_and_keeps_previous_snapshot(tmp_path):
+    pointer_path = tmp_path / SNAPSHOT_FILE
+    assert resolve_snapshot(pointer_path) is None
+
+    build_snapshot(tmp_path, _write_sources(tmp_path, distance=3))
+    first_path = resolve_snapshot(pointer_path)
+    first = KnowledgeSnapshot(first_path)
+
+    # Same content: same file, the pointer does not move
+    build_snapshot(tmp_path, _write_sources(tmp_path, distance=3))
+    assert resolve_snapshot(pointer_path) == first_path
+
+    build_snapshot(tmp_path, _write_sources(tmp_path, distance=5))
+    second_path = resolve_snapshot(pointer_path)
+    assert second_path != first_path
+    assert first_path.exists()
+    assert first.mapping("ingredient_to_dishes") == MAPPINGS["ingredient_to_dishes"]
+    np.testing.assert_array_equal(KnowledgeSnapshot(second_path).distance_matrix().distances, [[0, 5], [5, 0]])
+
+    build_snapshot(tmp_path, _write_sources(tmp_path, distance=7))
+    assert not first_path.exists()
+    assert second_path.exists()
+    assert sorted(path.name for path in tmp_path.glob("knowledge_snapshot-*.bin")) == sorted(
+        [second_path.name, resolve_snapshot(pointer_path).name]
+    )
@@ -0,0 +1,27 @@
+import json
+import os
+
+from src.ai.agents import mapping_store as mapping_store_module
+from src.ai.agents.mapping_store import MappingStore, load_category_dish_sets
+
+
+def _write(path, content, mtime_ns: int) -> None:
+    path.write_text(json.dumps(content), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_category_index_prefers_the_built_file_unless_a_source_is_newer(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapping_store_module, "mapping_store", MappingStore(tmp_path))
+    _write(tmp_path / "category_to_techniques.json", {"Taglio": ["Taglio Laser"]}, 1_000)
+    _write(tmp_path / "technique_to_dishes.json", {"Taglio Laser": [1, 2]}, 1_000)
+
+    # No built file: the join is computed from the sources
+    assert load_category_dish_sets().lookup("Taglio", None).to_list() == [1, 2]
+
+    # The built file is used as it is when it is not older than the sources
+    _write(tmp_path / "category_to_dishes.json", {"Taglio": [7]}, 2_000)
+    assert load_category_dish_sets().lookup("Taglio", None).to_list() == [7]
+
+    # A regenerated source makes the built file stale
+    _write(tmp_path / "technique_to_dishes.json", {"Taglio Laser": [3]}, 3_000)
+    assert load_category_dish_sets().lookup("Taglio", None).to_list() == [3]
@@ -0,0 +1,27 @@
+from src.preprocessing.parsed_text_cache import ParsedTextCache
+
+
+def test_round_trip_keeps_carriage_returns_and_page_offsets(tmp_path):
+    pdf_path = tmp_path / "menu.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    cache = ParsedTextCache(tmp_path / "cache")
+    pages = [("1", "line\r\nA\rB"), ("2", "second"), ("3", ""), ("4", "last\r")]
+
+    cache.put(pdf_path, pages)
+    cached = cache.get(pdf_path)
+
+    assert cached is not None
+    assert cached.file_name == "menu.pdf"
+    assert cached.text == "\n".join(text for _, text in pages)
+    assert cached.pages() == pages
+
+
+def test_miss_on_changed_content(tmp_path):
+    pdf_path = tmp_path / "menu.pdf"
+    pdf_path.write_bytes(b"v1")
+    cache = ParsedTextCache(tmp_path / "cache")
+    cache.put(pdf_path, [("1", "text")])
+
+    pdf_path.write_bytes(b"v2")
+
+    assert cache.get(pdf_path) is None
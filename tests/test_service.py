@@ -0,0 +1,90 @@
+import asyncio
+
+from datapizza.agents import Agent
+from datapizza.core.clients import Client, ClientResponse
+from datapizza.type import TextBlock
+from starlette.testclient import TestClient
+
+from src.service.app import create_app
+
+
+class StubClient(Client):
+    """Answers every question with a fixed list of dish ids, without calling an LLM."""
+
+    def __init__(self):
+        super().__init__(model_name="stub", system_prompt="")
+        self.calls = 0
+
+    def _respond(self, input) -> ClientResponse:
+        self.calls += 1
+        question = input[0].content if input else ""
+        if question == "errore":
+            raise RuntimeError("stub failure")
+        return ClientResponse(content=[TextBlock(content="I piatti sono [3, 1, 2]")])
+
+    def _invoke(self, *, input, tools, memory, **kwargs):
+        return self._respond(input)
+
+    async def _a_invoke(self, *, input, tools, memory, **kwargs):
+        if input and input[0].content == "lenta":
+            await asyncio.sleep(1)
+        return self._respond(input)
+
+    def _stream_invoke(self, **kwargs):
+        raise NotImplementedError
+
+    async def _a_stream_invoke(self, **kwargs):
+        raise NotImplementedError
+
+    def _structured_response(self, **kwargs):
+        raise NotImplementedError
+
+    async def _a_structured_response(self, **kwargs):
+        raise NotImplementedError
+
+    def _convert_tool_choice(self, tool_choice):
+        return {}
+
+
+def _client(**kwargs) -> tuple[TestClient, StubClient]:
+    stub = StubClient()
+    app = create_app(agent_factory=lambda: Agent(name="assistant", client=stub, system_prompt=""), preload=False, **kwargs)
+    return TestClient(app), stub
+
+
+def test_query_and_cached_answer():
+    client, stub = _client()
+    with client:
+        response = client.post("/query", json={"question": "Quali piatti usano la Farina di Luna?"})
+        assert response.status_code == 200
+        assert response.json()["dish_ids"] == [1, 2, 3]
+        assert response.json()["cached"] is False
+
+        response = client.post("/query", json={"question": "Quali piatti usano la Farina di Luna?"})
+        assert response.json()["cached"] is True
+        assert stub.calls == 1
+
+        stats = client.get("/stats").json()["answer_cache"]
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_query_errors():
+    client, _ = _client(timeout=0.2, cache_answers=False)
+    with client:
+        assert client.post("/query", json={"question": ""}).status_code == 422
+        assert client.post("/query", json={"question": "lenta"}).status_code == 504
+        response = client.post("/query", json={"question": "errore"})
+        assert response.status_code == 500
+        assert "error" in response.json()
+        assert client.get("/stats").json() == {"answer_cache": None}
+
+
+def test_batch_reports_errors_per_question():
+    client, _ = _client(timeout=0.2)
+    with client:
+        response = client.post("/query:batch", json={"questions": ["Piatti con Sale Cosmico?", "lenta"]})
+
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["dish_ids"] == [1, 2, 3]
+    assert "error" in second
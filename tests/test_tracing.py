@@ -0,0 +1,16 @@
+from src.ai.tracing import QuestionTrace, _span
+
+
+def test_frozen_trace_drops_later_spans():
+    trace = QuestionTrace("Quali piatti usano la Farina di Luna?")
+    with trace.activate():
+        with _span("llm", "invoke"):
+            pass
+        trace.freeze()
+        wall_time = trace.wall_time
+        with _span("tool", "get_ingredient_dish_ids"):
+            pass
+
+    assert [span.name for span in trace.spans] == ["invoke"]
+    assert trace.summary()["turns"] == 1
+    assert trace.wall_time == wall_time